@@ -1,5 +1,6 @@
 """Configuration for the grader service."""
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -21,6 +22,15 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-# Global settings instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the global settings instance, parsed on first access."""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # PEP 562: `from src.config import settings` resolves lazily via get_settings()
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
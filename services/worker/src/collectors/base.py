@@ -2,17 +2,24 @@
 import time
 import sqlite3
 import json
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from pathlib import Path
 import structlog
 from src.config import settings
-from src.db import check_source_available, update_source_stats, get_source, get_source_pause_until
+from postgrest.types import ReturningMethod
+from src.db import (
+    check_source_available, update_source_stats, get_source, get_source_pause_remaining,
+    invalidate_source_cache, get_supabase
+)
 
 logger = structlog.get_logger()
 
 CACHE_KEY_VERSION = "v2"  # bump to invalidate old cached entries
+MAX_COLLECT_WORKERS = 8  # upper bound for collect_many(); HTTP pools are sized to match
 
 
 class RateLimiter:
@@ -28,6 +35,7 @@ class RateLimiter:
         self.tokens = rate_per_minute
         self.last_refill = time.time()
         self.min_interval = 60.0 / rate_per_minute  # Minimum seconds between requests
+        self._lock = threading.Lock()  # collect_many() shares one limiter across threads
     
     def acquire(self) -> bool:
         """Acquire a token. Returns True if successful, False if rate limited.
@@ -35,24 +43,25 @@ class RateLimiter:
         Returns:
             True if token acquired, False if rate limited
         """
-        now = time.time()
-        elapsed = now - self.last_refill
-        
-        # Refill tokens based on elapsed time
-        if elapsed >= 60.0:
-            self.tokens = self.rate_per_minute
-            self.last_refill = now
-        else:
-            # Add tokens proportional to elapsed time
-            tokens_to_add = (elapsed / 60.0) * self.rate_per_minute
-            self.tokens = min(self.rate_per_minute, self.tokens + tokens_to_add)
-            self.last_refill = now
-        
-        if self.tokens >= 1.0:
-            self.tokens -= 1.0
-            return True
-        
-        return False
+        with self._lock:
+            now = time.time()
+            elapsed = now - self.last_refill
+            
+            # Refill tokens based on elapsed time
+            if elapsed >= 60.0:
+                self.tokens = self.rate_per_minute
+                self.last_refill = now
+            else:
+                # Add tokens proportional to elapsed time
+                tokens_to_add = (elapsed / 60.0) * self.rate_per_minute
+                self.tokens = min(self.rate_per_minute, self.tokens + tokens_to_add)
+                self.last_refill = now
+            
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return True
+            
+            return False
     
     def wait_if_needed(self):
         """Wait if necessary to respect rate limit."""
@@ -227,28 +236,29 @@ class BaseCollector(ABC):
             return
         
         # Update source stats (which tracks failure streaks)
-        update_source_stats(self.source_id, success)
+        failure_streak = update_source_stats(self.source_id, success)
         
         # Check if we need to pause source (circuit breaker opens)
         if not success:
-            source = get_source(self.source_id)
-            if source and source.get('failure_streak', 0) >= self.circuit_breaker_failure_threshold:
+            if failure_streak is None:
+                source = get_source(self.source_id)
+                failure_streak = source.get('failure_streak', 0) if source else 0
+            if failure_streak >= self.circuit_breaker_failure_threshold:
                 # Pause source for cooldown period
                 from datetime import datetime, timezone, timedelta
-                from src.db import supabase
                 paused_until = datetime.now(timezone.utc) + timedelta(seconds=self.circuit_breaker_cooldown_seconds)
                 
-                supabase.table("sources") \
+                get_supabase().table("sources") \
                     .update({
-                        'paused_until': paused_until.isoformat(),
-                        'updated_at': 'now()'
-                    }) \
+                        'paused_until': paused_until.isoformat()
+                    }, returning=ReturningMethod.minimal) \
                     .eq("id", self.source_id) \
                     .execute()
+                invalidate_source_cache(self.source_id)
                 
                 logger.warning("Circuit breaker opened", 
                              source_id=self.source_id,
-                             failure_streak=source.get('failure_streak', 0),
+                             failure_streak=failure_streak,
                              paused_until=paused_until.isoformat())
     
     def collect(self, query_params: Dict, exclude_keywords: List[str] = None) -> List[Dict]:
@@ -265,15 +275,11 @@ class BaseCollector(ABC):
 
         # Check circuit breaker
         if not self._check_circuit_breaker():
-            paused_until = None
-            try:
-                paused_until = get_source_pause_until(self.source_id)
-            except Exception:
-                pass
+            # Same cached status row the check just read: no extra round-trip
             logger.warning(
                 "Source unavailable (paused or disabled), skipping collection",
                 source_id=self.source_id,
-                paused_until=paused_until
+                pause_remaining=get_source_pause_remaining(self.source_id)
             )
             return []
 
@@ -328,6 +334,25 @@ class BaseCollector(ABC):
 
             raise
     
+    def collect_many(self, jobs: List[Tuple[Dict, List[str]]]) -> List[List[Dict]]:
+        """Collect several queries concurrently, e.g. one per intake.
+        
+        Collection is network-bound, so a small thread pool lets requests overlap
+        while sharing this collector's rate limiter and circuit breaker.
+        
+        Args:
+            jobs: List of (query_params, exclude_keywords) tuples
+            
+        Returns:
+            List of price point lists, in the same order as jobs
+        """
+        if not jobs:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(MAX_COLLECT_WORKERS, len(jobs))) as ex:
+            futures = [ex.submit(self.collect, query_params, exclude_keywords) for query_params, exclude_keywords in jobs]
+            return [f.result() for f in futures]
+    
     @abstractmethod
     def _collect_impl(self, query_params: dict, exclude_keywords: List[str]) -> List[Dict]:
         """Internal implementation of collection (to be implemented by subclasses).
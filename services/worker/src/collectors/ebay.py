@@ -1,17 +1,66 @@
 """eBay API collector using Buy Browse API."""
 import os
 import base64
+import re
+import threading
 import time
 import urllib.parse
 from datetime import datetime, timezone
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+import orjson
 import requests
 import structlog
-from src.collectors.base import BaseCollector
+from requests.adapters import HTTPAdapter
+from src.collectors.base import BaseCollector, MAX_COLLECT_WORKERS
 from src.config import settings
 
 logger = structlog.get_logger()
 
+# Shared HTTP session so every collector reuses warm keep-alive connections.
+# Browse/Insights payloads are large, highly compressible JSON; advertise brotli
+# alongside gzip (requests decodes both transparently when `brotli` is installed).
+_session = requests.Session()
+_session.headers["Accept-Encoding"] = "gzip, br"
+_session.mount("https://", HTTPAdapter(pool_maxsize=MAX_COLLECT_WORKERS))
+
+
+@lru_cache(maxsize=8)
+def _basic_and_body(client_id: str, client_secret: str, scope: str) -> Tuple[str, str]:
+    """Return the (Basic auth value, form-encoded body) for a token request.
+    
+    Both are constant per credential/scope pair, so token refreshes only pay the RTT.
+    """
+    basic = base64.b64encode(f"{client_id}:{client_secret}".encode("utf-8")).decode("utf-8")
+    body = urllib.parse.urlencode({
+        "grant_type": "client_credentials",
+        "scope": scope,  # Space-delimited scopes
+    })
+    return basic, body
+
+
+# ASCII-only lowercase table for the junk filter: eBay titles are overwhelmingly
+# ASCII, where a bytes translate avoids str.lower()'s Unicode case mapping.
+_ASCII_LOWER = bytes.maketrans(bytes(range(0x41, 0x5B)), bytes(range(0x61, 0x7B)))
+
+
+# Process-wide OAuth token cache keyed by (token_url, client_id), shared by all
+# collector instances. Refreshes are single-flight: one thread per key performs the
+# POST while the others block on the same lock and then reuse the fresh token.
+_token_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+_token_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_token_locks_guard = threading.Lock()
+
+
+def _token_lock(key: Tuple[str, str]) -> threading.Lock:
+    """Return the refresh lock for a token cache key, creating it on first use."""
+    with _token_locks_guard:
+        lock = _token_locks.get(key)
+        if lock is None:
+            lock = _token_locks[key] = threading.Lock()
+        return lock
+
+
 class EbayRateLimitError(Exception):
     """Raised when eBay throttles our calls (rate limit)."""
     pass
@@ -51,16 +100,20 @@ class EbayCollector(BaseCollector):
             self.token_url = "https://api.ebay.com/identity/v1/oauth2/token"
             self.browse_base = "https://api.ebay.com"
         
-        # In-memory token cache
-        self._token: Optional[str] = None
-        self._token_expiry: float = 0.0
+        self._session = _session
+    
+    def prewarm(self) -> None:
+        """Open the TLS connection to the eBay API host ahead of the first search.
+        
+        Best-effort: errors are ignored, the real request will simply pay the handshake.
+        """
+        try:
+            self._session.head(self.browse_base, timeout=5)
+        except Exception as e:
+            logger.debug("eBay connection prewarm failed", browse_base=self.browse_base, error=str(e))
         
     def _get_app_token(self) -> str:
         """Get app OAuth token (client_credentials). Raises with details on failure."""
-        now = time.time()
-        if self._token and now < self._token_expiry - 30:
-            return self._token
-        
         # Determine client_id/client_secret from settings with fallback
         client_id = settings.ebay_client_id or settings.ebay_app_id
         client_secret = settings.ebay_client_secret or settings.ebay_cert_id
@@ -71,18 +124,40 @@ class EbayCollector(BaseCollector):
                 "(or fallback EBAY_APP_ID and EBAY_CERT_ID)."
             )
         
-        basic = base64.b64encode(f"{client_id}:{client_secret}".encode("utf-8")).decode("utf-8")
+        key = (self.token_url, client_id)
+        cached = _token_cache.get(key)
+        if cached and time.time() < cached[1] - 30:
+            return cached[0]
+        
+        with _token_lock(key):
+            # Another thread may have refreshed the token while we waited
+            cached = _token_cache.get(key)
+            if cached and time.time() < cached[1] - 30:
+                return cached[0]
+            
+            token, expiry = self._request_app_token(client_id, client_secret)
+            _token_cache[key] = (token, expiry)
+            return token
+    
+    def _invalidate_app_token(self, stale_token: str) -> None:
+        """Drop a rejected token from the shared cache (unless already replaced)."""
+        client_id = settings.ebay_client_id or settings.ebay_app_id
+        key = (self.token_url, client_id)
+        with _token_lock(key):
+            cached = _token_cache.get(key)
+            if cached and cached[0] == stale_token:
+                del _token_cache[key]
+    
+    def _request_app_token(self, client_id: str, client_secret: str) -> Tuple[str, float]:
+        """POST to the OAuth token endpoint and return (access_token, expiry epoch)."""
+        basic, data = _basic_and_body(client_id, client_secret, settings.ebay_oauth_scope)
         headers = {
             "Authorization": f"Basic {basic}",
             "Content-Type": "application/x-www-form-urlencoded",
         }
-        data = {
-            "grant_type": "client_credentials",
-            "scope": settings.ebay_oauth_scope,  # Space-delimited scopes
-        }
         
         try:
-            r = requests.post(self.token_url, headers=headers, data=data, timeout=20)
+            r = self._session.post(self.token_url, headers=headers, data=data, timeout=20)
             
             if r.status_code != 200:
                 # Include status code and response text in error
@@ -96,7 +171,7 @@ class EbayCollector(BaseCollector):
                 )
                 raise Exception(error_msg)
             
-            payload = r.json()
+            payload = orjson.loads(r.content)
             token = payload.get("access_token")
             expires_in = int(payload.get("expires_in", 3600))
             
@@ -104,9 +179,7 @@ class EbayCollector(BaseCollector):
                 logger.error("eBay OAuth token response missing access_token", payload=payload)
                 raise Exception("eBay OAuth token response missing access_token")
             
-            self._token = token
-            self._token_expiry = time.time() + expires_in
-            return token
+            return token, time.time() + expires_in
             
         except Exception as e:
             if isinstance(e, Exception) and "OAuth token" in str(e):
@@ -126,7 +199,7 @@ class EbayCollector(BaseCollector):
             "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
         }
         
-        resp = requests.get(full_url, headers=headers, timeout=20)
+        resp = self._session.get(full_url, headers=headers, timeout=20)
         
         # 403/404 means not authorized for marketplace insights - fall back to Browse
         if resp.status_code in (403, 404):
@@ -145,7 +218,7 @@ class EbayCollector(BaseCollector):
             logger.error("Marketplace Insights search failed", status=resp.status_code, body=resp.text[:1500])
             return None
         
-        data = resp.json()
+        data = orjson.loads(resp.content)
         return data.get("itemSales", []) or []
     
     def _search_browse(self, query: str) -> List[Dict]:
@@ -161,16 +234,15 @@ class EbayCollector(BaseCollector):
             "X-EBAY-C-MARKETPLACE-ID": "EBAY_US",
         }
         
-        resp = requests.get(full_url, headers=headers, timeout=20)
+        resp = self._session.get(full_url, headers=headers, timeout=20)
         
         # If token expired/invalid, clear cache and retry once
         if resp.status_code == 401:
             logger.warning("eBay Browse returned 401; refreshing token and retrying once")
-            self._token = None
-            self._token_expiry = 0.0
+            self._invalidate_app_token(token)
             token = self._get_app_token()
             headers["Authorization"] = f"Bearer {token}"
-            resp = requests.get(full_url, headers=headers, timeout=20)
+            resp = self._session.get(full_url, headers=headers, timeout=20)
         
         # 429 is rate limit - raise as rate limit error (not auth failed)
         if resp.status_code == 429:
@@ -184,7 +256,7 @@ class EbayCollector(BaseCollector):
             logger.error("eBay Browse search failed", status=resp.status_code, body=resp.text[:1500])
             return []
         
-        data = resp.json()
+        data = orjson.loads(resp.content)
         return data.get("itemSummaries", []) or []
     
     def _build_query(self, query_params: dict) -> str:
@@ -265,19 +337,28 @@ class EbayCollector(BaseCollector):
         if not exclude_normalized:
             return items
         
+        # One alternation pattern scans each title in a single pass instead of one
+        # substring search per keyword; the bytes variant serves ASCII titles.
+        text_pattern = re.compile('|'.join(re.escape(k) for k in exclude_normalized))
+        bytes_pattern = re.compile(b'|'.join(re.escape(k.encode('utf-8')) for k in exclude_normalized))
+        
         filtered = []
         
         for item in items:
             # Get text fields to check (primarily title)
-            title = item.get('title', '').lower()
+            title = item.get('title', '')
             
             # Check if any exclude keyword appears in text fields
-            should_exclude = any(keyword in title for keyword in exclude_normalized)
+            if title.isascii():
+                should_exclude = bytes_pattern.search(title.encode('ascii').translate(_ASCII_LOWER)) is not None
+            else:
+                should_exclude = text_pattern.search(title.lower()) is not None
             
             if not should_exclude:
                 filtered.append(item)
             else:
-                matched_keywords = [k for k in exclude_normalized if k in title]
+                title_lower = title.lower()
+                matched_keywords = [k for k in exclude_normalized if k in title_lower]
                 logger.debug("Filtered out listing", 
                            title=item.get('title'),
                            matched_keywords=matched_keywords)
@@ -335,25 +416,21 @@ class EbayCollector(BaseCollector):
             # Determine if these are sold items (from Marketplace Insights) or active listings (from Browse)
             is_sold = items and len(items) > 0 and 'soldPrice' in items[0]
             
+            # Hoist the per-batch branch out of the loop:
+            # Marketplace Insights uses 'soldPrice', Browse uses 'price'
+            price_field = 'soldPrice' if is_sold else 'price'
+            price_type = 'sold' if is_sold else 'ask'
+            intake_id = query_params.get('intake_id')
+            job_id = query_params.get('job_id')
+            
             for item in items:
                 try:
-                    # Extract price - Marketplace Insights uses 'soldPrice', Browse uses 'price'
-                    if is_sold:
-                        price_obj = item.get('soldPrice', {})
-                        price_type = 'sold'
-                        # Marketplace Insights may have different field names
-                        item_id = item.get('itemId', '')
-                        title = item.get('title', '')
-                        item_web_url = item.get('itemWebUrl', '')
-                        # Sold date from Marketplace Insights
-                        sold_date = item.get('soldDate') or now_iso
-                    else:
-                        price_obj = item.get('price', {})
-                        price_type = 'ask'
-                        item_id = item.get('itemId', '')
-                        title = item.get('title', '')
-                        item_web_url = item.get('itemWebUrl', '')
-                        sold_date = now_iso
+                    price_obj = item.get(price_field, {})
+                    item_id = item.get('itemId', '')
+                    title = item.get('title', '')
+                    item_web_url = item.get('itemWebUrl', '')
+                    # Sold date from Marketplace Insights; active listings are observed now
+                    sold_date = (item.get('soldDate') or now_iso) if is_sold else now_iso
                     
                     price_value = price_obj.get('value')
                     currency = price_obj.get('currency', 'USD')
@@ -369,17 +446,17 @@ class EbayCollector(BaseCollector):
                     
                     # Build price point dict
                     price_point = {
-                        "intake_id": query_params.get('intake_id'),
+                        "intake_id": intake_id,
                         "source_id": self.source_id,
-                        "job_id": query_params.get('job_id'),
+                        "job_id": job_id,
                         "dedupe_key": dedupe_key,
                         "price_cents": price_cents,
                         "price_type": price_type,
                         "raw_payload": item,  # Store full eBay response
                         "listing_url": item_web_url,
                         "listing_title": title,
-                        "listing_date": sold_date if is_sold else now_iso,
-                        "observed_at": sold_date if is_sold else now_iso,
+                        "listing_date": sold_date,
+                        "observed_at": sold_date,
                         "match_strength": 1.0,
                         "external_id": item_id,
                         "filtered_out": False
@@ -1,4 +1,5 @@
 """Configuration management for the worker service."""
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -10,12 +11,34 @@ class Settings(BaseSettings):
     supabase_url: str
     supabase_key: str
     
+    # Direct Postgres connection for hot-path job RPCs (optional).
+    # Use the Supabase session pooler (port 5432) or a direct connection string.
+    supabase_db_url: Optional[str] = None
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    # 'session' (direct / port 5432) or 'transaction' (Supavisor port 6543)
+    supabase_pooler_mode: str = "session"
+    # Shared keep-alive HTTP pool for PostgREST calls
+    http_max_keepalive_connections: int = 50
+    http_max_connections: int = 100
+    
     # Worker identity
     worker_id: str = "worker-1"
+    log_level: str = "INFO"
     
     # Job polling
     poll_interval_seconds: int = 5
+    listen_poll_interval_seconds: int = 30  # safety-net poll while LISTENing for new jobs
     job_lock_timeout_seconds: int = 300
+    heartbeat_flush_interval_seconds: float = 2.0
+    heartbeat_min_interval_seconds: Optional[float] = None  # per job; None = lock timeout / 3
+    claim_prefetch_size: int = 4  # jobs claimed per round-trip
+    worker_concurrency: int = 1  # jobs processed at once (threads)
+    # > 0: jobs only mark the intake dirty and a worker loop recomputes each
+    # intake once it has been dirty this long (0 = recompute inline)
+    valuation_debounce_seconds: float = 0
+    valuation_workers: int = 0  # processes for very large valuations (0 = in-thread)
+    sql_percentile_fast_path: bool = False  # filter and rank comps in Postgres (migration 053)
     
     # eBay API (optional, can be in source config)
     # Prefer OAuth-style naming
@@ -32,6 +55,8 @@ class Settings(BaseSettings):
     # Cache
     cache_enabled: bool = True
     cache_ttl_seconds: int = 3600
+    source_cache_ttl_seconds: int = 60  # in-process cache of source rows/rules/availability
+    valuation_cache_ttl_seconds: int = 900  # skip recomputing an unchanged intake valuation
     
     class Config:
         env_file = ".env"
@@ -39,7 +64,17 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, parsing env/.env on first access only."""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # PEP 562: keep `from src.config import settings` working while deferring parsing
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 
@@ -1,96 +1,643 @@
 """Database client and helpers."""
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from postgrest.types import ReturningMethod
+from postgrest.utils import SyncClient
+from psycopg2.pool import ThreadedConnectionPool
+from psycopg2.extras import Json, RealDictCursor, execute_values
 from src.config import settings
-from typing import Optional
+from typing import Any, Callable, Optional, Tuple
 from datetime import datetime, timezone, timedelta
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import atexit
+import contextvars
+import functools
+import io
+import json
+import queue
+import random
+import select
+import threading
+import time
+import httpx
+import orjson
+import psycopg2
+import psycopg2.errors
 import structlog
 
 logger = structlog.get_logger()
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.supabase_url, settings.supabase_key)
+# (generated_at, iso string); updated_at columns are set by BEFORE UPDATE
+# triggers (migration 001), so client timestamps only fill the remaining columns
+_now_iso_cached = (0.0, '')
+
+
+def _now_iso() -> str:
+    """Current UTC time as an ISO-8601 string, regenerated at most every 0.5s."""
+    global _now_iso_cached
+    t = time.time()
+    if t - _now_iso_cached[0] > 0.5:
+        _now_iso_cached = (t, datetime.fromtimestamp(t, timezone.utc).isoformat())
+    return _now_iso_cached[1]
+
+
+class DatabaseUnavailableError(Exception):
+    """Raised without touching the network while the database circuit breaker is open."""
+
+
+class _DbCircuitBreaker:
+    """Per-process breaker shared by every PostgREST and Postgres call in this module.
+    
+    Opens after failure_threshold consecutive transient failures within
+    window_seconds; after reset_seconds a single half-open probe is let through,
+    and its outcome closes the breaker or keeps it open.
+    """
+    
+    def __init__(self, failure_threshold: int = 10, window_seconds: float = 30.0, reset_seconds: float = 5.0):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._first_failure_at = 0.0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probe_in_flight and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._probe_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("Database circuit breaker closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                # Failed half-open probe: stay open for another reset period
+                self._opened_at = now
+                self._probe_in_flight = False
+                return
+            if self._failures == 0 or now - self._first_failure_at > self.window_seconds:
+                self._failures = 0
+                self._first_failure_at = now
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = now
+                logger.error("Database circuit breaker opened", consecutive_failures=self._failures)
+
+
+_db_breaker = _DbCircuitBreaker()
+
+_TRANSIENT_HTTP_STATUSES = frozenset((502, 503, 504))
+_IDEMPOTENT_HTTP_METHODS = frozenset(("GET", "HEAD", "PATCH", "PUT", "DELETE"))
+
+
+class _TransientHTTPStatus(Exception):
+    """Gateway/overload response from PostgREST, raised internally so it can be retried."""
+    
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+def _is_transient_error(e: Exception) -> bool:
+    return isinstance(e, (
+        httpx.TransportError, _TransientHTTPStatus,
+        psycopg2.OperationalError, psycopg2.InterfaceError,
+    ))
+
+
+def _is_unsent_error(e: Exception) -> bool:
+    """Failures where the request never ran server-side, so even non-idempotent calls can retry."""
+    if isinstance(e, _TransientHTTPStatus):
+        return e.response.status_code == 503
+    return isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout))
+
+
+def retry_db(max_attempts: int = 3, base: float = 0.1, max_delay: float = 2.0,
+             retry_on: Callable[[Exception], bool] = _is_transient_error):
+    """Retry transient database errors with full-jitter exponential backoff.
+    
+    Every attempt goes through the shared circuit breaker; while it is open the
+    call fails fast with DatabaseUnavailableError. Non-transient errors (the
+    server answered) are re-raised immediately.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            for attempt in range(max_attempts):
+                if not _db_breaker.allow():
+                    raise DatabaseUnavailableError("Database circuit breaker is open")
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    if not retry_on(e):
+                        _db_breaker.record_success()
+                        raise
+                    _db_breaker.record_failure()
+                    if attempt == max_attempts - 1:
+                        raise
+                    logger.warning("Transient database error, retrying",
+                                   operation=fn.__name__, attempt=attempt + 1, error=str(e))
+                    time.sleep(random.uniform(0, min(max_delay, base * (2 ** attempt))))
+                else:
+                    _db_breaker.record_success()
+                    return result
+        return wrapper
+    return decorator
+
+
+class _OrjsonSyncClient(SyncClient):
+    """PostgREST session whose responses decode JSON with orjson instead of stdlib json.
+    
+    Requests also go through retry_db: idempotent methods retry any transient
+    failure, POSTs (RPCs, inserts) only failures where the request never ran.
+    """
+    
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        send = self._send_retrying if request.method in _IDEMPOTENT_HTTP_METHODS else self._send_retrying_unsent
+        try:
+            response = send(request, **kwargs)
+        except _TransientHTTPStatus as e:
+            response = e.response  # Out of retries: let postgrest raise its usual APIError
+        # postgrest builds APIResponse from response.json(); orjson.JSONDecodeError
+        # subclasses json.JSONDecodeError, so its empty-body handling still applies
+        response.json = lambda **_: orjson.loads(response.content)
+        return response
+    
+    def _send_checked(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        response = super().send(request, **kwargs)
+        if response.status_code in _TRANSIENT_HTTP_STATUSES:
+            raise _TransientHTTPStatus(response)
+        return response
+    
+    _send_retrying = retry_db()(_send_checked)
+    _send_retrying_unsent = retry_db(retry_on=_is_unsent_error)(_send_checked)
+
+
+def _pooled_postgrest_session(session: httpx.Client) -> SyncClient:
+    """Build a long-lived keep-alive PostgREST session mirroring an existing one.
+    
+    Keeps the base URL and auth/profile headers of the default session but sets
+    explicit connection limits, so concurrent callers reuse warm TCP+TLS connections.
+    """
+    return _OrjsonSyncClient(
+        base_url=session.base_url,
+        headers=session.headers,
+        limits=httpx.Limits(
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            max_connections=settings.http_max_connections,
+        ),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        follow_redirects=True,
+        http2=True,
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_supabase() -> Client:
+    """Return the process-wide Supabase client, building it (and its HTTP pool) once."""
+    client = create_client(
+        settings.supabase_url,
+        settings.supabase_key,
+        options=ClientOptions(postgrest_client_timeout=30, storage_client_timeout=30),
+    )
+    default_session = client.postgrest.session
+    client.postgrest.session = _pooled_postgrest_session(default_session)
+    default_session.close()
+    # close_clients normally does this; closing twice is harmless
+    atexit.register(client.postgrest.session.close)
+    return client
+
+
+def reset_supabase() -> Client:
+    """Close the shared client's HTTP pool and build a fresh client (tests, after fork)."""
+    global supabase
+    try:
+        get_supabase().postgrest.session.close()
+    except Exception as e:
+        logger.warning("Failed to close Supabase HTTP session", error=str(e))
+    get_supabase.cache_clear()
+    supabase = get_supabase()
+    return supabase
+
+
+# Single instance shared by every helper in this module
+supabase: Client = get_supabase()
+
+# Optional direct Postgres pool for the latency-critical job RPCs (claim, heartbeat,
+# retry, reclaim). Created lazily when SUPABASE_DB_URL is set; otherwise those
+# helpers go through PostgREST like everything else.
+_pg_pool: Optional[ThreadedConnectionPool] = None
+_pg_pool_lock = threading.Lock()
+
+
+def _uses_transaction_pooler() -> bool:
+    """True when SUPABASE_DB_URL points at the Supavisor transaction pooler (port 6543).
+    
+    Consecutive statements may then run on different backend connections, so no
+    session state (prepared statements, LISTEN, SET) can be relied on.
+    """
+    return settings.supabase_pooler_mode == 'transaction'
+
+
+def _get_pg_pool() -> Optional[ThreadedConnectionPool]:
+    """Return the shared Postgres connection pool, or None if not configured."""
+    global _pg_pool
+    if _pg_pool is None and settings.supabase_db_url:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                # psycopg2 only sends unnamed, one-shot statements, so there is no
+                # prepared-statement cache to disable under transaction pooling.
+                # Any client added here that does cache (asyncpg, psycopg3,
+                # SQLAlchemy) must turn it off when _uses_transaction_pooler().
+                _pg_pool = ThreadedConnectionPool(
+                    settings.db_pool_min_size,
+                    settings.db_pool_max_size,
+                    dsn=settings.supabase_db_url,
+                    application_name=settings.worker_id,
+                )
+                logger.info(
+                    "Postgres pool created",
+                    pooler_mode=settings.supabase_pooler_mode,
+                    max_size=settings.db_pool_max_size,
+                )
+    return _pg_pool
+
+
+@contextmanager
+def _pg_cursor(transaction: bool = False):
+    """Borrow a dict cursor from the pool, discarding broken connections.
+    
+    Statements autocommit unless transaction=True, in which case everything in
+    the block commits together (or rolls back on error).
+    """
+    pool = _get_pg_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        conn.autocommit = not transaction
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            yield cur
+        if transaction:
+            conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    except Exception:
+        if transaction:
+            conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+def _pg_query_once(sql: str, params: tuple = (), fetch: Optional[str] = None):
+    """Run one autocommit statement; fetch is None, 'one' or 'all'."""
+    with _pg_cursor() as cur:
+        cur.execute(sql, params)
+        if fetch == 'one':
+            row = cur.fetchone()
+            return dict(row) if row else None
+        if fetch == 'all':
+            return [dict(row) for row in cur.fetchall()]
+        return None
+
+
+_pg_query = retry_db()(_pg_query_once)
+# For statements that are not safe to repeat (claims, retry counters): breaker only
+_pg_query_no_retry = retry_db(max_attempts=1)(_pg_query_once)
+
+
+# Small shared pool so callers can overlap independent PostgREST reads instead of
+# paying their round-trips back to back (the client and psycopg2 pool are thread-safe)
+_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-io")
+
+
+def submit_db(fn: Callable, *args, **kwargs) -> Future:
+    """Run a db helper on the shared I/O pool (in the caller's context) and return its Future."""
+    return _io_executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def close_clients():
+    """Release prefetched jobs and close pooled HTTP and Postgres connections.
+    
+    Call once at worker shutdown.
+    """
+    release_claimed_jobs(settings.worker_id)
+    flush_job_logs()
+    _io_executor.shutdown(wait=True)
+    try:
+        supabase.postgrest.session.close()
+    except Exception as e:
+        logger.error("Failed to close Supabase HTTP session", error=str(e))
+    if _pg_pool is not None:
+        try:
+            _pg_pool.closeall()
+        except Exception as e:
+            logger.error("Failed to close Postgres pool", error=str(e))
+    _close_job_listener()
+
+
+# Dedicated LISTEN connection used by the main worker loop to sleep until a new
+# job is inserted or requeued (see migrations 041, 049). LISTEN needs a real
+# session, so this is skipped under the transaction pooler and the loop falls
+# back to plain polling.
+JOB_NOTIFY_CHANNEL = 'scrape_jobs_new'
+_listen_conn = None
+
+
+def _open_job_listener():
+    """Open the LISTEN connection if a session-capable SUPABASE_DB_URL is configured."""
+    global _listen_conn
+    if not settings.supabase_db_url or _uses_transaction_pooler():
+        return None
+    try:
+        conn = psycopg2.connect(
+            settings.supabase_db_url,
+            application_name=f"{settings.worker_id}-listener",
+        )
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {JOB_NOTIFY_CHANNEL}")
+        _listen_conn = conn
+        logger.info("Listening for new jobs", channel=JOB_NOTIFY_CHANNEL)
+    except Exception as e:
+        logger.warning("Failed to open job listener; polling instead", error=str(e))
+        _listen_conn = None
+    return _listen_conn
+
+
+def _close_job_listener():
+    global _listen_conn
+    if _listen_conn is not None:
+        try:
+            _listen_conn.close()
+        except Exception:
+            pass
+        _listen_conn = None
+
+
+def wait_for_new_job(timeout: float, job_type: str = 'pricing') -> bool:
+    """Block until a new job of job_type is announced or timeout elapses.
+    
+    Without a listener this is just time.sleep(timeout). With one, inserts and
+    requeues are announced, so the wait stretches to
+    listen_poll_interval_seconds; that poll only catches retryable jobs
+    coming due. Notifications that arrived while the worker was busy are
+    drained and return immediately. Only call from the main worker loop thread.
+    
+    Args:
+        timeout: Maximum seconds to wait without a listener (the poll interval)
+        job_type: Job type the caller claims; other payloads are ignored
+        
+    Returns:
+        True if a matching notification was received, False on timeout
+    """
+    conn = _listen_conn or _open_job_listener()
+    if conn is None:
+        time.sleep(timeout)
+        return False
+    
+    deadline = time.monotonic() + max(timeout, settings.listen_poll_interval_seconds)
+    try:
+        while True:
+            conn.poll()
+            payloads = [n.payload for n in conn.notifies]
+            conn.notifies.clear()
+            if any(p in (job_type, '') for p in payloads):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            select.select([conn], [], [], remaining)
+    except Exception as e:
+        # Dropped connection: reopen on the next idle wait, poll meanwhile
+        logger.warning("Job listener failed; will reconnect", error=str(e))
+        _close_job_listener()
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+        return False
+
+
+# Heartbeats are idempotent latest-write-wins signals, so they are buffered here
+# and written by flush_heartbeats() in one heartbeat_flush RPC per tick instead of
+# one round-trip per heartbeat.
+_heartbeat_lock = threading.Lock()
+_pending_job_heartbeats: set = set()
+_pending_worker_heartbeat: Optional[tuple] = None  # (worker_id, meta)
+# Jobs this process is running; every tick heartbeats them (subject to the
+# throttle below) without a per-job timer thread.
+_active_jobs: set = set()
+# job_id -> monotonic time of its last written heartbeat. A job heartbeat only
+# has to land well inside job_lock_timeout_seconds, so more frequent ones are dropped.
+_job_heartbeat_sent: dict = {}
+
+
+def _job_heartbeat_min_interval() -> float:
+    if settings.heartbeat_min_interval_seconds is not None:
+        return settings.heartbeat_min_interval_seconds
+    return settings.job_lock_timeout_seconds / 3
 
 
 def upsert_worker_heartbeat(worker_id: str, meta: dict = None):
-    """Upsert worker heartbeat to worker_heartbeats table.
+    """Queue a worker heartbeat for the next flush_heartbeats() call.
     
     Args:
         worker_id: Worker instance identifier
         meta: Optional metadata (version, hostname, last_job_id, etc.)
     """
+    global _pending_worker_heartbeat
+    with _heartbeat_lock:
+        _pending_worker_heartbeat = (worker_id, meta or {})
+
+
+def worker_tick(reclaim: bool = False) -> int:
+    """Write all buffered worker and job heartbeats in a single RPC.
+    
+    With reclaim=True the same round-trip (worker_tick SQL function) also
+    reclaims stuck jobs; otherwise only heartbeat_flush is called, and nothing
+    at all if no heartbeat is buffered. On failure the heartbeat snapshot is put
+    back (unless a newer worker heartbeat was queued meanwhile) so the next tick
+    retries it.
+    
+    Returns:
+        Number of jobs reclaimed (0 when not reclaiming or on failure)
+    """
+    global _pending_worker_heartbeat
+    prefetched = _prefetched_job_ids()
+    now = time.monotonic()
+    min_interval = _job_heartbeat_min_interval()
+    with _heartbeat_lock:
+        job_ids = [
+            job_id for job_id in _pending_job_heartbeats.union(_active_jobs, prefetched)
+            if now - _job_heartbeat_sent.get(job_id, float('-inf')) >= min_interval
+        ]
+        worker = _pending_worker_heartbeat
+        _pending_job_heartbeats.clear()
+        _pending_worker_heartbeat = None
+    
+    if not job_ids and worker is None and not reclaim:
+        return 0
+    
+    payload = {'job_ids': job_ids}
+    if worker is not None:
+        payload['worker_id'], payload['meta'] = worker
+    
     try:
-        meta_json = meta or {}
-        supabase.rpc('upsert_worker_heartbeat', {
-            'p_worker_id': worker_id,
-            'p_meta': meta_json
-        }).execute()
-        logger.debug("Worker heartbeat updated", worker_id=worker_id)
+        reclaimed_count = 0
+        if reclaim:
+            if _get_pg_pool() is not None:
+                row = _pg_query(
+                    "SELECT reclaimed FROM worker_tick(%s, %s, true)",
+                    (Json(payload), settings.job_lock_timeout_seconds),
+                    fetch='one'
+                )
+                reclaimed_count = (row or {}).get('reclaimed') or 0
+            else:
+                result = supabase.rpc('worker_tick', {
+                    'p_payload': payload,
+                    'p_lock_timeout_seconds': settings.job_lock_timeout_seconds,
+                    'p_reclaim': True
+                }).execute()
+                if result.data:
+                    reclaimed_count = result.data[0].get('reclaimed') or 0
+        elif _get_pg_pool() is not None:
+            _pg_query("SELECT heartbeat_flush(%s)", (Json(payload),))
+        else:
+            supabase.rpc('heartbeat_flush', {'p_payload': payload}).execute()
+        with _heartbeat_lock:
+            for job_id in job_ids:
+                _job_heartbeat_sent[job_id] = now
+            # Forget finished jobs (nothing has re-sent them for a full lock timeout)
+            for job_id in [j for j, t in _job_heartbeat_sent.items()
+                           if now - t > settings.job_lock_timeout_seconds]:
+                del _job_heartbeat_sent[job_id]
+        logger.debug("Flushed heartbeats", job_count=len(job_ids), worker=worker is not None, reclaim=reclaim)
+        return reclaimed_count
     except Exception as e:
-        logger.error("Failed to upsert worker heartbeat", worker_id=worker_id, error=str(e))
+        logger.error("Failed to flush heartbeats", job_count=len(job_ids), reclaim=reclaim, error=str(e))
+        with _heartbeat_lock:
+            _pending_job_heartbeats.update(job_ids)
+            if _pending_worker_heartbeat is None:
+                _pending_worker_heartbeat = worker
+        return 0
+
+
+def flush_heartbeats():
+    """Write all buffered worker and job heartbeats (worker_tick without reclaim)."""
+    worker_tick(reclaim=False)
+
+
+# Jobs claimed ahead of time by claim_next_job. They are already 'running' and
+# locked to this worker, so flush_heartbeats keeps them alive until processed
+# and close_clients hands any leftovers back to the queue.
+_claimed_jobs: deque = deque()
+_claimed_jobs_lock = threading.Lock()
+
+
+def _prefetched_job_ids() -> list:
+    with _claimed_jobs_lock:
+        return [job['id'] for job in _claimed_jobs]
 
 
 def claim_next_job(worker_id: str) -> Optional[dict]:
-    """Atomically claim the next pending pricing job from the queue.
+    """Return the next pricing job, claiming a batch from the queue when the local buffer is empty.
     
-    Uses the database function for atomic job acquisition to prevent
-    double-processing by multiple workers. Only claims jobs with job_type='pricing'.
+    Uses the claim_pending_jobs database function (FOR UPDATE SKIP LOCKED) to
+    atomically claim up to settings.claim_prefetch_size jobs per round-trip,
+    preventing double-processing by multiple workers. Only claims jobs with
+    job_type='pricing'.
     
     Args:
         worker_id: Worker instance identifier
         
     Returns:
         Job dictionary if claimed, None otherwise
+        
+    Raises:
+        DatabaseUnavailableError: If the database circuit breaker is open
     """
+    with _claimed_jobs_lock:
+        if _claimed_jobs:
+            return _claimed_jobs.popleft()
+    
     try:
-        result = supabase.rpc('claim_next_pending_job', {
-            'p_worker_id': worker_id,
-            'p_lock_timeout_seconds': settings.job_lock_timeout_seconds,
-            'p_job_type': 'pricing'
-        }).execute()
-        
-        if result.data and len(result.data) > 0:
-            return result.data[0]
-        return None
+        limit = max(settings.claim_prefetch_size, 1)
+        if _get_pg_pool() is not None:
+            jobs = _pg_query_no_retry(
+                "SELECT * FROM claim_pending_jobs(%s, %s, %s, %s)",
+                (worker_id, settings.job_lock_timeout_seconds, 'pricing', limit),
+                fetch='all'
+            )
+        else:
+            result = supabase.rpc('claim_pending_jobs', {
+                'p_worker_id': worker_id,
+                'p_lock_timeout_seconds': settings.job_lock_timeout_seconds,
+                'p_job_type': 'pricing',
+                'p_limit': limit
+            }).execute()
+            jobs = result.data or []
+    except DatabaseUnavailableError:
+        raise  # Let the main loop back off instead of logging every idle poll
     except Exception as e:
         logger.error("Failed to claim job", worker_id=worker_id, error=str(e))
         return None
+    
+    if not jobs:
+        return None
+    with _claimed_jobs_lock:
+        _claimed_jobs.extend(jobs[1:])
+    return jobs[0]
 
 
-def get_pending_jobs(limit: int = 10):
-    """Get pending scrape jobs from the queue. (Deprecated - use claim_next_job instead)"""
+def release_claimed_jobs(worker_id: str) -> int:
+    """Return prefetched jobs that were never started to the pending queue.
+    
+    Args:
+        worker_id: Worker instance identifier (only its own locks are released)
+        
+    Returns:
+        Number of jobs released
+    """
+    with _claimed_jobs_lock:
+        job_ids = [job['id'] for job in _claimed_jobs]
+        _claimed_jobs.clear()
+    if not job_ids:
+        return 0
+    
     try:
-        result = supabase.table("scrape_jobs") \
-            .select("*") \
-            .eq("status", "pending") \
-            .order("created_at", desc=False) \
-            .limit(limit) \
-            .execute()
-        return result.data
+        result = supabase.rpc('release_claimed_jobs', {
+            'p_worker_id': worker_id,
+            'p_job_ids': job_ids
+        }).execute()
+        released = result.data if isinstance(result.data, int) else len(job_ids)
+        logger.info("Released prefetched jobs", worker_id=worker_id, count=released)
+        return released
     except Exception as e:
-        logger.error("Failed to get pending jobs", error=str(e))
-        return []
+        # They stay locked until reclaim_stuck_jobs times them out
+        logger.error("Failed to release prefetched jobs", worker_id=worker_id, job_ids=job_ids, error=str(e))
+        return 0
 
 
-def lock_job(job_id: str, worker_id: str) -> bool:
-    """Attempt to lock a job. Returns True if successfully locked. (Deprecated - use claim_next_job instead)"""
-    try:
-        now_iso = datetime.now(timezone.utc).isoformat()
-        result = supabase.table("scrape_jobs") \
-            .update({
-                "status": "running",
-                "locked_at": now_iso,
-                "locked_by": worker_id,
-                "started_at": now_iso,
-                "updated_at": now_iso
-            }) \
-            .eq("id", job_id) \
-            .eq("status", "pending") \
-            .execute()
-        
-        return len(result.data) > 0
-    except Exception as e:
-        logger.error("Failed to lock job", job_id=job_id, error=str(e))
-        return False
+# Legacy status names still accepted from callers
+_STATUS_MAP = {"completed": "succeeded", "cancelled": "failed"}
+_TERMINAL_STATUSES = frozenset(("succeeded", "failed"))
+# Mirrors scrape_jobs_status_check (migration 007)
+_JOB_STATUSES = frozenset(("pending", "running", "succeeded", "failed", "retryable"))
 
 
 def update_job_status(job_id: str, status: str, error_message: str = None):
@@ -99,32 +646,20 @@ def update_job_status(job_id: str, status: str, error_message: str = None):
     Sets completed_at only for terminal states: 'succeeded' or 'failed'.
     Does NOT set completed_at for 'retryable' (it's not terminal).
     """
-    now_iso = datetime.now(timezone.utc).isoformat()
-    update_data = {
-        "status": status,
-        "updated_at": now_iso
-    }
-    
-    # Map old status names to new ones for backwards compatibility
-    status_map = {
-        "completed": "succeeded",
-        "cancelled": "failed"
-    }
-    if status in status_map:
-        status = status_map[status]
-        update_data["status"] = status
-    
-    # Only set completed_at for terminal states (succeeded, failed)
-    # Do NOT set for retryable - it's handled by mark_job_retryable SQL function
-    if status in ("succeeded", "failed"):
-        update_data["completed_at"] = now_iso
-    
+    status = _STATUS_MAP.get(status, status)
+    if status not in _JOB_STATUSES:
+        logger.error("Refusing to set unknown job status", job_id=job_id, status=status)
+        return
+    update_data = {"status": status}
+    # retryable is handled by the mark_job_retryable SQL function
+    if status in _TERMINAL_STATUSES:
+        update_data["completed_at"] = _now_iso()
     if error_message:
         update_data["error_message"] = error_message
     
     try:
         supabase.table("scrape_jobs") \
-            .update(update_data) \
+            .update(update_data, returning=ReturningMethod.minimal) \
             .eq("id", job_id) \
             .execute()
         logger.info("Updated job status", job_id=job_id, status=status)
@@ -132,19 +667,63 @@ def update_job_status(job_id: str, status: str, error_message: str = None):
         logger.error("Failed to update job status", job_id=job_id, error=str(e))
 
 
-def mark_job_retryable_in(job_id: str, delay_seconds: int, error_message: Optional[str] = None):
-    """Mark job retryable and set next_retry_at = now + delay_seconds."""
+def complete_job(job_id: str, status: str, error_message: str = None,
+                 log: dict = None, source_id: str = None, success: bool = None):
+    """Finish a job in one transactional RPC (status, optional source stats, closing log line).
+    
+    Falls back to the individual update_job_status/update_source_stats/
+    log_job_event helpers if the RPC fails.
+    
+    Args:
+        job_id: Job ID
+        status: Final status ('succeeded', 'failed' or 'retryable')
+        error_message: Optional error message
+        log: Optional log entry {'level', 'message', 'metadata'}
+        source_id: If given with success, also record source success/failure
+        success: Source outcome to record (ignored without source_id)
+    """
+    status = _STATUS_MAP.get(status, status)
+    try:
+        supabase.rpc('complete_job', {
+            'p_job_id': job_id,
+            'p_status': status,
+            'p_error': error_message,
+            'p_source_id': source_id,
+            'p_success': success,
+            'p_log': log
+        }).execute()
+        if source_id and success is not None:
+            invalidate_source_cache(source_id)
+        logger.info("Completed job", job_id=job_id, status=status)
+    except Exception as e:
+        logger.warning("complete_job RPC failed, falling back to separate writes", job_id=job_id, error=str(e))
+        if log:
+            log_job_event(job_id, log['level'], log['message'], log.get('metadata'))
+        if source_id and success is not None:
+            update_source_stats(source_id, success)
+        update_job_status(job_id, status, error_message)
+
+
+def mark_job_retryable_in(job_id: str, delay_seconds: int, error_message: Optional[str] = None,
+                          attempts: Optional[int] = None):
+    """Mark job retryable and set next_retry_at = now + delay_seconds.
+    
+    attempts, when given, is recorded on the row so the next retry can back off further.
+    """
     try:
-        now = datetime.now(timezone.utc)
-        retry_at = now + timedelta(seconds=max(1, int(delay_seconds)))
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=max(1, int(delay_seconds)))
         update = {
             "status": "retryable",
-            "updated_at": now.isoformat(),
             "next_retry_at": retry_at.isoformat(),
         }
         if error_message:
             update["error_message"] = error_message
-        supabase.table("scrape_jobs").update(update).eq("id", job_id).execute()
+        if attempts is not None:
+            update["attempts"] = attempts
+        supabase.table("scrape_jobs") \
+            .update(update, returning=ReturningMethod.minimal) \
+            .eq("id", job_id) \
+            .execute()
         logger.info("Marked job as retryable", job_id=job_id, next_retry_at=retry_at.isoformat(), delay_seconds=delay_seconds)
     except Exception as e:
         logger.error("Failed to mark job as retryable", job_id=job_id, error=str(e))
@@ -158,37 +737,197 @@ def mark_job_retryable(job_id: str, base_delay_minutes: int = 5):
         base_delay_minutes: Base delay in minutes for exponential backoff (default 5)
     """
     try:
-        supabase.rpc('mark_job_retryable', {
-            'job_id': job_id,
-            'base_delay_minutes': base_delay_minutes
-        }).execute()
+        if _get_pg_pool() is not None:
+            _pg_query_no_retry("SELECT mark_job_retryable(%s, %s)", (job_id, base_delay_minutes))
+        else:
+            supabase.rpc('mark_job_retryable', {
+                'job_id': job_id,
+                'base_delay_minutes': base_delay_minutes
+            }).execute()
         logger.info("Marked job as retryable", job_id=job_id)
     except Exception as e:
         logger.error("Failed to mark job as retryable", job_id=job_id, error=str(e))
 
 
+# Job log lines are telemetry, not state: they are queued here and written by a
+# background thread in multi-row inserts instead of one round-trip per line.
+LOG_BATCH_SIZE = 100
+LOG_FLUSH_INTERVAL_SECONDS = 0.5
+_log_queue: "queue.Queue[dict]" = queue.Queue(maxsize=10_000)
+_log_writer: Optional[threading.Thread] = None
+_log_writer_lock = threading.Lock()
+_log_writer_stop = threading.Event()
+
+
 def log_job_event(job_id: str, level: str, message: str, metadata: dict = None):
-    """Log an event for a job."""
+    """Queue an event for a job (non-blocking; drops the oldest entry when full)."""
+    entry = {
+        "job_id": job_id,
+        "log_level": level,
+        "message": message,
+        "metadata": metadata or {},
+        # Stamped now so batching does not reorder lines relative to other writes;
+        # formatted to ISO by the writer thread, off the job's path
+        "created_at": time.time()
+    }
+    _ensure_log_writer()
+    while True:
+        try:
+            _log_queue.put_nowait(entry)
+            return
+        except queue.Full:
+            try:
+                _log_queue.get_nowait()
+            except queue.Empty:
+                pass
+
+
+def _ensure_log_writer():
+    global _log_writer
+    if _log_writer is None:
+        with _log_writer_lock:
+            if _log_writer is None:
+                _log_writer = threading.Thread(target=_log_writer_loop, name="job-log-writer", daemon=True)
+                _log_writer.start()
+
+
+def _log_writer_loop():
+    """Drain the log queue in batches of up to LOG_BATCH_SIZE or every LOG_FLUSH_INTERVAL_SECONDS."""
+    while not (_log_writer_stop.is_set() and _log_queue.empty()):
+        try:
+            batch = [_log_queue.get(timeout=LOG_FLUSH_INTERVAL_SECONDS)]
+        except queue.Empty:
+            continue
+        deadline = time.monotonic() + LOG_FLUSH_INTERVAL_SECONDS
+        while len(batch) < LOG_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _write_job_logs(batch)
+
+
+def _write_job_logs(batch: list):
+    for e in batch:
+        e["created_at"] = datetime.fromtimestamp(e["created_at"], timezone.utc).isoformat()
+    # Direct connection when available: one multi-row INSERT, no PostgREST JSON hop
+    if _get_pg_pool() is not None:
+        try:
+            with _pg_cursor() as cur:
+                execute_values(
+                    cur,
+                    "INSERT INTO scrape_job_logs (job_id, log_level, message, metadata, created_at) VALUES %s",
+                    [(e["job_id"], e["log_level"], e["message"], Json(e["metadata"]), e["created_at"]) for e in batch],
+                    page_size=LOG_BATCH_SIZE,
+                )
+            return
+        except Exception as e:
+            logger.warning("Direct job log insert failed, using PostgREST", count=len(batch), error=str(e))
     try:
-        supabase.table("scrape_job_logs") \
-            .insert({
-                "job_id": job_id,
-                "log_level": level,
-                "message": message,
-                "metadata": metadata or {}
-            }) \
-            .execute()
+        supabase.table("scrape_job_logs").insert(batch, returning=ReturningMethod.minimal).execute()
     except Exception as e:
-        logger.error("Failed to log job event", job_id=job_id, error=str(e))
+        logger.error("Failed to write job log batch", count=len(batch), error=str(e))
+
+
+def flush_job_logs(timeout: float = 5.0):
+    """Stop the background log writer after writing everything queued. Call at shutdown."""
+    global _log_writer
+    writer = _log_writer
+    if writer is None:
+        return
+    _log_writer_stop.set()
+    writer.join(timeout=timeout)
+    if writer.is_alive():
+        logger.warning("Job log writer did not drain within timeout", pending=_log_queue.qsize())
+        return
+    _log_writer = None
+    _log_writer_stop.clear()
+
+
+# Backstop for entry points that never reach close_clients (scripts, crashes
+# that unwind normally); a no-op once the writer has already been drained.
+atexit.register(flush_job_logs)
+
+
+PRICE_POINT_BATCH_SIZE = 500  # rows per bulk RPC, keeps payloads under PostgREST limits
+PRICE_POINT_COPY_THRESHOLD = 200  # with a direct connection, COPY batches at least this large
+
+# Column order shared by the COPY staging table (migration 043) and the positional
+# rows sent to upsert_price_point_rows (migration 045)
+_PRICE_POINT_COLUMNS = (
+    ('intake_id', 'UUID'),
+    ('source_id', 'UUID'),
+    ('dedupe_key', 'TEXT'),
+    ('job_id', 'UUID'),
+    ('price_cents', 'INTEGER'),
+    ('price_type', 'TEXT'),
+    ('raw_payload', 'JSONB'),
+    ('listing_url', 'TEXT'),
+    ('listing_title', 'TEXT'),
+    ('listing_date', 'TIMESTAMPTZ'),
+    ('observed_at', 'TIMESTAMPTZ'),
+    ('match_strength', 'DECIMAL(3,2)'),
+    ('external_id', 'TEXT'),
+    ('filtered_out', 'BOOLEAN'),
+)
+_PRICE_POINT_FIELDS = tuple(col for col, _ in _PRICE_POINT_COLUMNS)
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _copy_field(value) -> str:
+    """Encode one value for COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, default=str)
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _price_point_rows(price_points: list) -> list:
+    """Flatten price point dicts into tuples in _PRICE_POINT_FIELDS order (one pass)."""
+    return [tuple(map(pp.get, _PRICE_POINT_FIELDS)) for pp in price_points]
+
+
+@retry_db()
+def _copy_price_points(rows: list) -> int:
+    """Stream positional price point rows through COPY into a temp table and merge them in one transaction."""
+    buf = io.StringIO()
+    for row in rows:
+        buf.write('\t'.join(map(_copy_field, row)))
+        buf.write('\n')
+    buf.seek(0)
+    
+    column_defs = ', '.join(f"{col} {sql_type}" for col, sql_type in _PRICE_POINT_COLUMNS)
+    column_names = ', '.join(_PRICE_POINT_FIELDS)
+    with _pg_cursor(transaction=True) as cur:
+        cur.execute(f"CREATE TEMP TABLE tmp_price_points ({column_defs}) ON COMMIT DROP")
+        cur.copy_expert(f"COPY tmp_price_points ({column_names}) FROM STDIN", buf)
+        cur.execute("SELECT merge_staged_price_points() AS affected")
+        return cur.fetchone()['affected'] or 0
 
 
 def insert_price_points(price_points: list):
     """Insert or update price points into the database (atomic UPSERT).
     
-    Uses PostgreSQL function with ON CONFLICT to atomically upsert rows
-    based on (intake_id, source_id, dedupe_key) unique constraint.
-    Updates existing rows if new version has higher match_strength or
-    more complete fields (external_id, raw_payload).
+    Sends rows in batches to the upsert_price_point_rows PostgreSQL function as
+    positional arrays (no repeated key names), which performs a single
+    set-based INSERT ... ON CONFLICT per batch on the
+    (intake_id, source_id, dedupe_key) unique constraint. Existing rows are
+    updated if the new version has higher match_strength or more complete
+    fields (external_id, raw_payload).
+    
+    Multiple batches are posted concurrently on the shared I/O pool. Transient
+    failures are retried by the session (see retry_db); a batch that still
+    fails is logged and skipped, the other batches are still written.
+    
+    With a direct Postgres connection, large inputs skip JSON entirely: rows
+    are streamed with COPY into a temp table and merged server-side with the
+    same dedupe/conflict rules (merge_staged_price_points).
     
     Args:
         price_points: List of price point dictionaries
@@ -196,111 +935,316 @@ def insert_price_points(price_points: list):
     if not price_points:
         return
     
-    inserted_count = 0
-    updated_count = 0
+    rows = _price_point_rows(price_points)
+    
+    if len(rows) >= PRICE_POINT_COPY_THRESHOLD and _get_pg_pool() is not None:
+        try:
+            affected = _copy_price_points(rows)
+            logger.info("Upserted price points via COPY",
+                       total=len(price_points),
+                       affected=affected)
+            return
+        except Exception as e:
+            logger.warning("COPY price point upsert failed, falling back to bulk RPC",
+                           total=len(price_points), error=str(e))
+    
+    starts = range(0, len(rows), PRICE_POINT_BATCH_SIZE)
+    if len(starts) == 1:
+        processed_count = _upsert_price_point_batch(rows, 0)
+    else:
+        # Batches are independent upserts: post them concurrently on the I/O
+        # pool so their round-trips and uploads overlap
+        futures = [submit_db(_upsert_price_point_batch, rows, start) for start in starts]
+        processed_count = sum(f.result() for f in futures)
     
+    logger.info("Upserted price points",
+               total=len(price_points),
+               processed=processed_count)
+
+
+def _upsert_price_point_batch(rows: list, start: int) -> int:
+    """Upsert rows[start:start + PRICE_POINT_BATCH_SIZE]; returns rows written (0 on failure)."""
+    batch_rows = rows[start:start + PRICE_POINT_BATCH_SIZE]
     try:
-        for pp in price_points:
-            try:
-                # Use PostgreSQL function for atomic upsert
-                result = supabase.rpc('upsert_price_point', {
-                    'p_intake_id': pp.get('intake_id'),
-                    'p_source_id': pp.get('source_id'),
-                    'p_dedupe_key': pp.get('dedupe_key'),
-                    'p_job_id': pp.get('job_id'),
-                    'p_price_cents': pp.get('price_cents'),
-                    'p_price_type': pp.get('price_type'),
-                    'p_raw_payload': pp.get('raw_payload'),
-                    'p_listing_url': pp.get('listing_url'),
-                    'p_listing_title': pp.get('listing_title'),
-                    'p_listing_date': pp.get('listing_date'),
-                    'p_observed_at': pp.get('observed_at'),
-                    'p_match_strength': float(pp.get('match_strength', 1.0)),
-                    'p_external_id': pp.get('external_id'),
-                    'p_filtered_out': pp.get('filtered_out', False)
-                }).execute()
-                
-                if result.data:
-                    # Check if this was an insert or update by checking if row existed before
-                    # Since we can't easily tell, we'll assume it's an update if we get a result
-                    # In practice, both inserts and updates return the id
-                    inserted_count += 1
-            except Exception as e:
-                # If it's a unique constraint violation that wasn't handled, log and continue
-                error_str = str(e)
-                if 'unique constraint' in error_str.lower() or 'duplicate key' in error_str.lower():
-                    # This shouldn't happen with the function, but handle gracefully
-                    logger.warning("Price point conflict (should be handled by function)", 
-                                 error=error_str, 
-                                 dedupe_key=pp.get('dedupe_key'))
-                    updated_count += 1
-                else:
-                    logger.error("Failed to upsert price point", error=error_str, price_point_id=pp.get('id'))
-                continue
-        
-        logger.info("Upserted price points", 
-                   total=len(price_points),
-                   processed=inserted_count + updated_count)
+        supabase.rpc('upsert_price_point_rows', {'p_rows': batch_rows}).execute()
+        return len(batch_rows)
     except Exception as e:
-        logger.error("Failed to insert price points", error=str(e))
+        logger.error("Bulk price point upsert failed",
+                     batch_start=start, batch_size=len(batch_rows), error=str(e))
+        return 0
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and LRU eviction."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Tuple[bool, Any]:
+        """Return (hit, value); expired entries count as a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Source config changes on human timescales, but is read several times per job.
+# Errors are never cached; local writes (pause, failure streak) invalidate.
+_source_cache = TTLCache(maxsize=2048, ttl=settings.source_cache_ttl_seconds)
+_source_rules_cache = TTLCache(maxsize=2048, ttl=settings.source_cache_ttl_seconds * 2)
+_source_status_cache = TTLCache(maxsize=2048, ttl=settings.source_cache_ttl_seconds)  # (enabled, paused_until_epoch)
+_source_excludes_cache = TTLCache(maxsize=2048, ttl=settings.source_cache_ttl_seconds * 2)  # normalized rules
+
+
+def invalidate_source_cache(source_id: str):
+    """Drop cached source config/availability after this worker changes the source row."""
+    _source_cache.pop(source_id)
+    _source_status_cache.pop(source_id)
+
+
+# Only the columns the worker reads (collector setup, circuit breaker, valuation weights)
+SOURCE_COLUMNS = "id, name, adapter_type, enabled, config, rate_limit_per_minute, reputation_weight, failure_streak"
+# Fields ValuationEngine reads from each comp; callers filter filtered_out=false
+# in the query, so that column is not shipped back
+VALUATION_PRICE_POINT_COLUMNS = "source_id, price_cents, price_type, match_strength"
+# Search fields plus the condition flags used for valuation penalties
+ATTRIBUTION_COLUMNS = (
+    "intake_id, year, mintmark, denomination, series, title, keywords_include, keywords_exclude, "
+    "cleaned, scratches, rim_damage, details_damaged, harsh_cleaning"
+)
+
+SOURCE_RULE_COLUMNS = "rule_type, rule_value, active, priority"
+
+# Flipped off once if the plan-cached read functions (migration 050) are missing
+_has_read_functions = True
+
+
+def _pg_read(sql: str, params: tuple, fetch: str) -> Tuple[bool, Any]:
+    """Read through the direct pool's plan-cached functions.
+    
+    Returns (True, rows) on success, or (False, None) if there is no pool or
+    the read failed, in which case the caller uses PostgREST.
+    """
+    global _has_read_functions
+    if not _has_read_functions or _get_pg_pool() is None:
+        return False, None
+    try:
+        return True, _pg_query(sql, params, fetch=fetch)
+    except psycopg2.errors.UndefinedFunction:
+        _has_read_functions = False
+    except Exception as e:
+        logger.warning("Direct read failed, using PostgREST", error=str(e))
+    return False, None
 
 
 def get_source(source_id: str):
-    """Get source configuration."""
+    """Get source configuration (cached for SOURCE_CACHE_TTL_SECONDS)."""
+    hit, cached = _source_cache.get(source_id)
+    if hit:
+        return cached
+    ok, data = _pg_read(f"SELECT {SOURCE_COLUMNS} FROM get_source(%s)", (source_id,), 'one')
+    if ok:
+        if data:
+            _source_cache.set(source_id, data)
+        return data
     try:
         result = supabase.table("sources") \
-            .select("*") \
+            .select(SOURCE_COLUMNS) \
             .eq("id", source_id) \
-            .single() \
+            .limit(1) \
+            .maybe_single() \
             .execute()
-        return result.data
+        data = result.data if result else None
+        if data:
+            _source_cache.set(source_id, data)
+        return data
     except Exception as e:
         logger.error("Failed to get source", source_id=source_id, error=str(e))
         return None
 
 
+def get_sources_bulk(source_ids) -> list:
+    """Get several sources in one round-trip; cached entries are served locally.
+    
+    Args:
+        source_ids: Iterable of source IDs, duplicates allowed (missing sources
+            are simply absent from the result)
+        
+    Returns:
+        List of source dictionaries
+    """
+    sources, missing = [], []
+    for source_id in dict.fromkeys(source_ids):
+        hit, cached = _source_cache.get(source_id)
+        if hit:
+            sources.append(cached)
+        else:
+            missing.append(source_id)
+    if not missing:
+        return sources
+    
+    try:
+        if _get_pg_pool() is not None:
+            fetched = _pg_query(
+                f"SELECT {SOURCE_COLUMNS} FROM sources WHERE id = ANY(%s::uuid[])",
+                (missing,),
+                fetch='all'
+            )
+        else:
+            result = supabase.table("sources") \
+                .select(SOURCE_COLUMNS) \
+                .in_("id", missing) \
+                .execute()
+            fetched = result.data or []
+    except Exception as e:
+        logger.error("Failed to get sources", count=len(missing), error=str(e))
+        return sources
+    for source in fetched:
+        _source_cache.set(source['id'], source)
+    return sources + fetched
+
+
 def get_source_rules(source_id: str):
-    """Get active source rules."""
+    """Get active source rules (cached for twice SOURCE_CACHE_TTL_SECONDS)."""
+    hit, cached = _source_rules_cache.get(source_id)
+    if hit:
+        return cached
+    ok, rules = _pg_read(f"SELECT {SOURCE_RULE_COLUMNS} FROM get_source_rules(%s)", (source_id,), 'all')
+    if ok:
+        _source_rules_cache.set(source_id, rules)
+        return rules
     try:
         result = supabase.table("source_rules") \
-            .select("*") \
+            .select(SOURCE_RULE_COLUMNS) \
             .eq("source_id", source_id) \
             .eq("active", True) \
             .order("priority", desc=False) \
             .execute()
+        _source_rules_cache.set(source_id, result.data)
         return result.data
     except Exception as e:
         logger.error("Failed to get source rules", source_id=source_id, error=str(e))
         return []
 
 
+def get_source_exclude_keywords(source_id: str) -> frozenset:
+    """Get a source's active exclude_keywords rules, trimmed and lowercased.
+    
+    Normalized once per rules fetch rather than on every job; expires with
+    the rules cache.
+    """
+    hit, cached = _source_excludes_cache.get(source_id)
+    if hit:
+        return cached
+    rules = get_source_rules(source_id)
+    excludes = frozenset(
+        r['rule_value'].strip().lower() for r in rules
+        if r['rule_type'] == 'exclude_keywords' and r['active'] and r['rule_value'] and r['rule_value'].strip()
+    )
+    # A failed read returns [] without caching it; do not cache that either
+    if _source_rules_cache.get(source_id)[0]:
+        _source_excludes_cache.set(source_id, excludes)
+    return excludes
+
+
+# Per-job memo for data that cannot change while a job runs. Unset (None) outside
+# a job, so nothing leaks between jobs; submit_db copies the context so prefetches
+# on the I/O pool fill the same dict.
+_job_scope: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("job_scope", default=None)
+
+
+def begin_job_scope() -> contextvars.Token:
+    """Start a fresh per-job memo in the current context. Call at the start of each job.
+    
+    Returns:
+        Token to pass to end_job_scope() when the job finishes
+    """
+    return _job_scope.set({})
+
+
+def end_job_scope(token: contextvars.Token):
+    """Drop the memo started by begin_job_scope(), restoring the previous scope."""
+    _job_scope.reset(token)
+
+
 def get_attribution(intake_id: str):
-    """Get attribution data for an intake."""
-    try:
-        result = supabase.table("attributions") \
-            .select("*") \
-            .eq("intake_id", intake_id) \
-            .single() \
-            .execute()
-        return result.data
-    except Exception as e:
-        logger.error("Failed to get attribution", intake_id=intake_id, error=str(e))
-        return None
+    """Get attribution data for an intake (memoized within the current job scope)."""
+    scope = _job_scope.get()
+    key = ("attribution", intake_id)
+    if scope is not None and key in scope:
+        return scope[key]
+    ok, data = _pg_read(f"SELECT {ATTRIBUTION_COLUMNS} FROM get_attribution(%s)", (intake_id,), 'one')
+    if not ok:
+        try:
+            result = supabase.table("attributions") \
+                .select(ATTRIBUTION_COLUMNS) \
+                .eq("intake_id", intake_id) \
+                .limit(1) \
+                .maybe_single() \
+                .execute()
+            data = result.data if result else None
+        except Exception as e:
+            logger.error("Failed to get attribution", intake_id=intake_id, error=str(e))
+            return None
+    if scope is not None:
+        scope[key] = data
+    return data
+
+
+def register_job(job_id: str):
+    """Heartbeat job_id on every worker tick until unregister_job is called.
+    
+    The claim itself set heartbeat_at, so the first write waits out the min
+    interval; jobs shorter than that never send one.
+    """
+    with _heartbeat_lock:
+        _active_jobs.add(job_id)
+        _job_heartbeat_sent.setdefault(job_id, time.monotonic())
+
+
+def unregister_job(job_id: str):
+    """Stop heartbeating job_id (call when the job finishes, however it finishes)."""
+    with _heartbeat_lock:
+        _active_jobs.discard(job_id)
+        _pending_job_heartbeats.discard(job_id)
+        _job_heartbeat_sent.pop(job_id, None)
 
 
 def update_job_heartbeat(job_id: str):
-    """Update job heartbeat timestamp.
+    """Queue a job heartbeat for the next flush_heartbeats() call.
+    
+    Dropped at flush time if this job's heartbeat was written less than
+    HEARTBEAT_MIN_INTERVAL_SECONDS ago (default: a third of the lock timeout).
     
     Args:
         job_id: Job ID to update heartbeat for
     """
-    try:
-        supabase.rpc('update_job_heartbeat', {
-            'p_job_id': job_id
-        }).execute()
-        logger.debug("Updated job heartbeat", job_id=job_id)
-    except Exception as e:
-        logger.error("Failed to update job heartbeat", job_id=job_id, error=str(e))
+    with _heartbeat_lock:
+        _pending_job_heartbeats.add(job_id)
 
 
 def reclaim_stuck_jobs() -> int:
@@ -310,22 +1254,20 @@ def reclaim_stuck_jobs() -> int:
         Number of jobs reclaimed
     """
     try:
-        result = supabase.rpc('reclaim_stuck_jobs', {
-            'p_lock_timeout_seconds': settings.job_lock_timeout_seconds
-        }).execute()
-        
-        # Handle scalar return - PostgreSQL functions returning INTEGER
-        # may return the value directly in data or as data[0]
-        if result.data:
-            if isinstance(result.data, int):
-                reclaimed_count = result.data
-            elif isinstance(result.data, list) and len(result.data) > 0:
-                reclaimed_count = result.data[0]
-            else:
-                reclaimed_count = 0
+        if _get_pg_pool() is not None:
+            row = _pg_query(
+                "SELECT reclaim_stuck_jobs(%s) AS reclaimed",
+                (settings.job_lock_timeout_seconds,),
+                fetch='one'
+            )
+            reclaimed_count = row['reclaimed'] or 0
         else:
-            reclaimed_count = 0
-            
+            result = supabase.rpc('reclaim_stuck_jobs', {
+                'p_lock_timeout_seconds': settings.job_lock_timeout_seconds
+            }).execute()
+            # PostgREST returns a scalar INTEGER function result as a bare JSON number
+            reclaimed_count = result.data if isinstance(result.data, int) else 0
+        
         if reclaimed_count > 0:
             logger.info("Reclaimed stuck jobs", count=reclaimed_count)
         return reclaimed_count
@@ -334,120 +1276,266 @@ def reclaim_stuck_jobs() -> int:
         return 0
 
 
-def update_source_stats(source_id: str, success: bool):
+def update_source_stats(source_id: str, success: bool) -> Optional[int]:
     """Update source statistics (success/failure tracking).
     
     Args:
         source_id: Source ID
         success: True if operation succeeded, False if failed
+        
+    Returns:
+        The source's failure_streak after the update, or None if unknown
     """
     try:
-        now_iso = datetime.now(timezone.utc).isoformat()
+        # One atomic server-side statement for either outcome (no read-modify-write)
+        result = supabase.rpc('record_source_outcome', {
+            'p_source_id': source_id,
+            'p_success': success
+        }).execute()
+        streak = result.data if isinstance(result.data, int) else None
+    except Exception as e:
+        logger.warning("record_source_outcome failed, falling back", source_id=source_id, error=str(e))
+        streak = _update_source_stats_fallback(source_id, success)
+
+    if success:
+        # Only a cached non-zero streak is now stale; skip the common case
+        hit, cached = _source_cache.get(source_id)
+        if hit and cached.get('failure_streak'):
+            invalidate_source_cache(source_id)
+    else:
+        invalidate_source_cache(source_id)
+    return streak
+
+
+def _update_source_stats_fallback(source_id: str, success: bool) -> Optional[int]:
+    """Pre-048 path: plain UPDATE on success, increment_source_failure on failure."""
+    try:
         if success:
             supabase.table("sources") \
                 .update({
-                    'last_success_at': now_iso,
-                    'failure_streak': 0,
-                    'updated_at': now_iso
-                }) \
-                .eq("id", source_id) \
-                .execute()
-        else:
-            # Read current streak, increment, update
-            current = supabase.table("sources") \
-                .select("failure_streak") \
-                .eq("id", source_id) \
-                .single() \
-                .execute()
-            
-            new_streak = (current.data.get('failure_streak', 0) if current.data else 0) + 1
-            
-            supabase.table("sources") \
-                .update({
-                    'last_failure_at': now_iso,
-                    'failure_streak': new_streak,
-                    'updated_at': now_iso
-                }) \
+                    'last_success_at': _now_iso(),
+                    'failure_streak': 0
+                }, returning=ReturningMethod.minimal) \
                 .eq("id", source_id) \
                 .execute()
+            return 0
+        supabase.rpc('increment_source_failure', {
+            'p_source_id': source_id
+        }).execute()
     except Exception as e:
         logger.error("Failed to update source stats", source_id=source_id, error=str(e))
+    return None
+
+
+# Flipped off once if the generated column (migration 040) is missing
+_has_paused_until_epoch = True
+
+
+def _fetch_source_status(source_id: str) -> Optional[Tuple[bool, Optional[int]]]:
+    """Read (enabled, paused_until as Unix seconds) for a source, or None if missing."""
+    global _has_paused_until_epoch
+    if _has_paused_until_epoch:
+        try:
+            result = supabase.table("sources") \
+                .select("enabled, paused_until_epoch") \
+                .eq("id", source_id) \
+                .limit(1) \
+                .maybe_single() \
+                .execute()
+            if not result or not result.data:
+                return None
+            return result.data.get('enabled', False), result.data.get('paused_until_epoch')
+        except Exception as e:
+            if 'paused_until_epoch' not in str(e):
+                raise
+            # Migration 040 not applied yet: parse paused_until ourselves
+            _has_paused_until_epoch = False
+    
+    result = supabase.table("sources") \
+        .select("enabled, paused_until") \
+        .eq("id", source_id) \
+        .limit(1) \
+        .maybe_single() \
+        .execute()
+    if not result or not result.data:
+        return None
+    
+    paused_until_epoch = None
+    paused_until = result.data.get('paused_until')
+    if paused_until:
+        try:
+            paused_until_epoch = int(datetime.fromisoformat(paused_until.replace('Z', '+00:00')).timestamp())
+        except Exception:
+            pass  # Invalid date, assume available
+    return result.data.get('enabled', False), paused_until_epoch
 
 
 def check_source_available(source_id: str) -> bool:
     """Check if source is available (enabled and not paused).
     
+    The enabled flag and pause expiry (Unix seconds) are cached for
+    SOURCE_CACHE_TTL_SECONDS; the expiry itself is compared against the clock
+    on every call.
+    
     Args:
         source_id: Source ID
         
     Returns:
         True if source is available, False otherwise
     """
-    try:
-        result = supabase.table("sources") \
-            .select("enabled, paused_until") \
-            .eq("id", source_id) \
-            .single() \
-            .execute()
-        
-        if not result.data:
-            return False
-        
-        enabled = result.data.get('enabled', False)
-        paused_until = result.data.get('paused_until')
-        
-        if not enabled:
-            return False
-        
-        if paused_until:
-            # Check if pause has expired
-            from datetime import datetime, timezone
-            try:
-                pause_time = datetime.fromisoformat(paused_until.replace('Z', '+00:00'))
-                if pause_time > datetime.now(timezone.utc):
-                    return False  # Still paused
-            except Exception:
-                pass  # Invalid date, assume available
-        
-        return True
-    except Exception as e:
-        logger.error("Failed to check source availability", source_id=source_id, error=str(e))
+    status = _cached_source_status(source_id)
+    if status is None:
+        return False
+    
+    enabled, paused_until_epoch = status
+    if not enabled:
         return False
+    if paused_until_epoch is not None and paused_until_epoch > time.time():
+        return False  # Still paused
+    return True
 
 
-def get_source_pause_until(source_id: str) -> Optional[str]:
-    """Return paused_until (ISO string) for a source, if any."""
+def _cached_source_status(source_id: str) -> Optional[Tuple[bool, Optional[int]]]:
+    hit, status = _source_status_cache.get(source_id)
+    if hit:
+        return status
     try:
-        result = supabase.table("sources") \
-            .select("paused_until") \
-            .eq("id", source_id) \
-            .limit(1) \
-            .execute()
-        if result.data and len(result.data) > 0:
-            return result.data[0].get("paused_until")
-        return None
+        status = _fetch_source_status(source_id)
     except Exception as e:
-        logger.error("Failed to get source paused_until", source_id=source_id, error=str(e))
+        logger.error("Failed to check source availability", source_id=source_id, error=str(e))
+        return None
+    if status is not None:
+        _source_status_cache.set(source_id, status)
+    return status
+
+
+def get_source_pause_remaining(source_id: str) -> Optional[int]:
+    """Seconds until a paused source resumes, or None if it is not paused.
+    
+    Served from the same cached status as check_source_available, so calling
+    it right after an unavailable check costs no round-trip.
+    """
+    status = _cached_source_status(source_id)
+    if status is None or status[1] is None:
         return None
+    remaining = int(status[1] - time.time())
+    return remaining if remaining > 0 else None
 
 
 def pause_source(source_id: str, seconds: int, reason: str = None) -> None:
     """Temporarily pause a source by setting paused_until."""
     try:
-        now = datetime.now(timezone.utc)
-        paused_until = (now + timedelta(seconds=seconds)).isoformat()
+        paused_until = (datetime.now(timezone.utc) + timedelta(seconds=seconds)).isoformat()
         update_data = {
             "paused_until": paused_until,
-            "last_failure_at": now.isoformat(),
-            "updated_at": now.isoformat(),
+            "last_failure_at": _now_iso(),
         }
-        supabase.table("sources").update(update_data).eq("id", source_id).execute()
+        supabase.table("sources") \
+            .update(update_data, returning=ReturningMethod.minimal) \
+            .eq("id", source_id) \
+            .execute()
+        invalidate_source_cache(source_id)
         logger.warning("Paused source", source_id=source_id, paused_until=paused_until, reason=reason)
     except Exception as e:
         logger.error("Failed to pause source", source_id=source_id, seconds=seconds, error=str(e))
 
 
-def upsert_valuation(intake_id: str, valuation_data: dict):
+def disable_source(source_id: str, reason: str) -> None:
+    """Disable a source and fail its queued (pending/retryable) jobs atomically.
+    
+    Falls back to only disabling the source if the disable_source_and_fail_jobs
+    function (migration 054) is unavailable.
+    """
+    try:
+        result = supabase.rpc('disable_source_and_fail_jobs', {
+            'p_source_id': source_id,
+            'p_reason': reason
+        }).execute()
+        logger.warning("Disabled source", source_id=source_id, failed_jobs=result.data, reason=reason)
+    except Exception as e:
+        logger.warning("disable_source_and_fail_jobs failed, falling back", source_id=source_id, error=str(e))
+        try:
+            supabase.table("sources") \
+                .update({"enabled": False}, returning=ReturningMethod.minimal) \
+                .eq("id", source_id) \
+                .execute()
+        except Exception as e:
+            logger.error("Failed to disable source", source_id=source_id, error=str(e))
+    invalidate_source_cache(source_id)
+
+
+def mark_valuation_dirty(intake_id: str) -> bool:
+    """Queue an intake for a deferred valuation recompute (see migration 051).
+    
+    Returns:
+        True if the intake was queued (or already was)
+    """
+    try:
+        supabase.rpc('mark_valuation_dirty', {'p_intake_id': intake_id}).execute()
+        return True
+    except Exception as e:
+        logger.error("Failed to queue valuation", intake_id=intake_id, error=str(e))
+        return False
+
+
+def claim_dirty_valuations(limit: int = 20) -> list:
+    """Remove and return intakes whose valuation has been dirty for the debounce window.
+    
+    Args:
+        limit: Maximum number of intakes to claim
+        
+    Returns:
+        List of intake IDs (empty on error)
+    """
+    try:
+        result = supabase.rpc('claim_dirty_valuations', {
+            'p_debounce_seconds': settings.valuation_debounce_seconds,
+            'p_limit': limit
+        }).execute()
+        return [row['intake_id'] for row in (result.data or [])]
+    except DatabaseUnavailableError:
+        return []
+    except Exception as e:
+        logger.error("Failed to claim dirty valuations", error=str(e))
+        return []
+
+
+# Valuation input RPCs found missing (PGRST202); not retried for this process
+_missing_valuation_rpcs: set = set()
+
+
+def get_valuation_inputs(intake_id: str, percentiles: bool = False) -> Optional[dict]:
+    """Get an intake's unfiltered comps aggregated server-side for ValuationEngine.
+    
+    One small row (sorted prices, counts, match strength sums per source)
+    instead of every price point row.
+    
+    Args:
+        intake_id: Intake ID
+        percentiles: Use valuation_percentiles (migration 053), which also
+            filters outliers and ranks percentiles so no prices are returned
+        
+    Returns:
+        RPC result, or None if the RPC is unavailable or failed (callers then
+        fetch the price points themselves)
+    """
+    rpc = 'valuation_percentiles' if percentiles else 'compute_valuation_inputs'
+    if rpc in _missing_valuation_rpcs:
+        return None
+    try:
+        result = supabase.rpc(rpc, {
+            'p_intake_id': intake_id
+        }).execute()
+        return result.data
+    except Exception as e:
+        if getattr(e, 'code', None) == 'PGRST202':  # function not found
+            _missing_valuation_rpcs.add(rpc)
+        logger.warning("Valuation inputs RPC failed, fetching price points",
+                      rpc=rpc, intake_id=intake_id, error=str(e))
+        return None
+
+
+def upsert_valuation(intake_id: str, valuation_data: dict) -> bool:
     """Create or update a valuation (atomic UPSERT).
     
     Uses PostgreSQL function with ON CONFLICT to atomically upsert
@@ -456,10 +1544,13 @@ def upsert_valuation(intake_id: str, valuation_data: dict):
     Args:
         intake_id: Intake ID
         valuation_data: Valuation data dictionary
+        
+    Returns:
+        True if the valuation was written
     """
     try:
-        # Use PostgreSQL function for atomic upsert
-        result = supabase.rpc('upsert_valuation', {
+        # Use PostgreSQL function for atomic upsert (single round-trip, ON CONFLICT (intake_id))
+        supabase.rpc('upsert_valuation', {
             'p_intake_id': intake_id,
             'p_price_cents_p10': valuation_data.get('price_cents_p10'),
             'p_price_cents_p20': valuation_data.get('price_cents_p20'),
@@ -479,8 +1570,10 @@ def upsert_valuation(intake_id: str, valuation_data: dict):
         }).execute()
         
         logger.info("Upserted valuation", intake_id=intake_id)
+        return True
     except Exception as e:
         logger.error("Failed to upsert valuation", intake_id=intake_id, error=str(e))
+        return False
 
 
 
@@ -1,10 +1,61 @@
 """Valuation engine for computing prices from price points."""
-import statistics
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional, Union
+import array
+from bisect import bisect_right
+import hashlib
+import numpy as np
+import orjson
 import structlog
 
 logger = structlog.get_logger()
 
+# Reported price bands: p20 quick_sale, p40 fair_low, median fair_mid, p60 fair_high, p80 premium
+_PERCENTILES = (0.10, 0.20, 0.40, 0.50, 0.60, 0.80, 0.90)
+
+
+class Percentiles(NamedTuple):
+    """Price percentiles in cents (fields in _PERCENTILES order, then the mean)."""
+    p10: Optional[int]
+    p20: Optional[int]
+    p40: Optional[int]
+    median: Optional[int]
+    p60: Optional[int]
+    p80: Optional[int]
+    p90: Optional[int]
+    mean: Optional[int]
+
+
+_NO_PERCENTILES = Percentiles(*([None] * len(Percentiles._fields)))
+# Confidence score tables: points[bisect_right(thresholds, value)]
+_COMP_COUNT_THRESHOLDS, _COMP_COUNT_POINTS = (5, 10, 20), (0, 1, 2, 3)
+_SOLD_RATIO_THRESHOLDS, _SOLD_RATIO_POINTS = (0.5, 0.8), (0, 1, 2)
+_SPREAD_RATIO_THRESHOLDS, _SPREAD_RATIO_POINTS = (0.2, 0.4, 0.6), (3, 2, 1, 0)
+# Attribution fields that change the confidence score
+CONDITION_FLAGS = ('cleaned', 'scratches', 'rim_damage', 'details_damaged', 'harsh_cleaning')
+
+
+def valuation_fingerprint(price_points: Union[List[Dict], Dict], sources: List[Dict], attribution: Optional[Dict]) -> str:
+    """Hash every input compute_valuation reads, so an unchanged result can be recognized.
+    
+    Args:
+        price_points: Price point dictionaries, or the compute_valuation_inputs aggregate
+        sources: Source dictionaries, as passed to ValuationEngine
+        attribution: Attribution dictionary or None
+        
+    Returns:
+        Hex digest; equal digests mean compute_valuation would return the same valuation
+    """
+    payload = orjson.dumps(
+        {
+            'points': price_points,
+            'weights': {s['id']: s.get('reputation_weight') for s in sources},
+            'flags': [attribution.get(f) for f in CONDITION_FLAGS] if attribution else None,
+        },
+        option=orjson.OPT_SORT_KEYS,
+        default=str,
+    )
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
 
 class ValuationEngine:
     """Engine for computing valuations from price points."""
@@ -17,27 +68,32 @@ class ValuationEngine:
         """
         self.sources = {s['id']: s for s in (sources or [])}
     
-    def _filter_outliers(self, prices: List[int], method: str = 'iqr') -> List[int]:
+    def _filter_outliers(self, prices, method: str = 'iqr') -> np.ndarray:
         """Filter outliers from price list using IQR or MAD method.
         
+        Quartiles and medians are order statistics, so they are selected with
+        np.partition (linear time) rather than a full sort.
+        
         Args:
-            prices: List of prices in cents
+            prices: Prices in cents (list or int64 array)
             method: Method to use ('iqr' or 'mad')
             
         Returns:
-            Filtered list of prices
+            Filtered prices as an int64 array (original order preserved)
         """
-        if len(prices) < 4:
+        prices = np.asarray(prices, dtype=np.int64)
+        n = len(prices)
+        if n < 4:
             return prices
         
         if method == 'mad':
             # Median Absolute Deviation (MAD) method
-            sorted_prices = sorted(prices)
-            median = sorted_prices[len(sorted_prices) // 2]
+            mid = n // 2
+            median = np.partition(prices, mid)[mid]
             
             # Compute MAD
-            deviations = [abs(p - median) for p in sorted_prices]
-            mad = sorted(deviations)[len(deviations) // 2]
+            deviations = np.abs(prices - median)
+            mad = np.partition(deviations, mid)[mid]
             
             # If MAD is 0, fall back to IQR
             if mad == 0:
@@ -45,81 +101,74 @@ class ValuationEngine:
             else:
                 # Filter using MAD (typically 2.5-3 MAD from median)
                 threshold = 2.5 * mad
-                filtered = [p for p in prices if abs(p - median) <= threshold]
-                logger.debug("Filtered outliers (MAD)", original_count=len(prices), filtered_count=len(filtered))
+                filtered = prices[deviations <= threshold]
+                logger.debug("Filtered outliers (MAD)", original_count=n, filtered_count=len(filtered))
                 return filtered
         
         if method == 'iqr':
             # Interquartile Range (IQR) method
-            sorted_prices = sorted(prices)
-            q1_index = len(sorted_prices) // 4
-            q3_index = (3 * len(sorted_prices)) // 4
-            q1 = sorted_prices[q1_index]
-            q3 = sorted_prices[q3_index]
+            q1_index = n // 4
+            q3_index = (3 * n) // 4
+            q1, q3 = np.partition(prices, [q1_index, q3_index])[[q1_index, q3_index]]
             iqr = q3 - q1
             
-            # Use 1.5 * IQR for outlier detection
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
+            # Use 1.5 * IQR for outlier detection. Prices are whole cents, so
+            # the bounds are rounded inward to integers (same result as the
+            # float bounds) and the mask compares int64 to int64 without
+            # upcasting the whole array to float64.
+            margin = (3 * iqr) // 2
+            lower_bound = q1 - margin
+            upper_bound = q3 + margin
             
-            filtered = [p for p in prices if lower_bound <= p <= upper_bound]
-            logger.debug("Filtered outliers (IQR)", original_count=len(prices), filtered_count=len(filtered))
+            filtered = prices[(prices >= lower_bound) & (prices <= upper_bound)]
+            logger.debug("Filtered outliers (IQR)", original_count=n, filtered_count=len(filtered))
             return filtered
         
         return prices
     
-    def _compute_percentiles(self, prices: List[int]) -> Dict[str, Optional[int]]:
+    def _compute_percentiles(self, prices) -> Percentiles:
         """Compute percentiles from price list including price bands.
         
+        All seven ranks are selected from a single np.partition call.
+        
         Args:
-            prices: List of prices in cents
+            prices: Prices in cents (list or int64 array)
             
         Returns:
-            Dictionary with p10, p20, p40, median (p50), p60, p80, p90, mean
+            Percentiles with p10, p20, p40, median (p50), p60, p80, p90, mean
         """
-        if not prices:
-            return {
-                'p10': None,
-                'p20': None,
-                'p40': None,
-                'median': None,
-                'p60': None,
-                'p80': None,
-                'p90': None,
-                'mean': None
-            }
-        
-        sorted_prices = sorted(prices)
-        n = len(sorted_prices)
+        prices = np.asarray(prices, dtype=np.int64)
+        n = len(prices)
+        if not n:
+            return _NO_PERCENTILES
         
         # Percentile indices (0-indexed)
-        def percentile_idx(p: float) -> int:
-            return int(p * (n - 1))
+        indices = [int(p * (n - 1)) for p in _PERCENTILES]
+        ranked = np.partition(prices, indices)[indices]
         
-        return {
-            'p10': sorted_prices[percentile_idx(0.10)],
-            'p20': sorted_prices[percentile_idx(0.20)],  # quick_sale
-            'p40': sorted_prices[percentile_idx(0.40)],  # fair_low
-            'median': sorted_prices[percentile_idx(0.50)],  # fair_mid
-            'p60': sorted_prices[percentile_idx(0.60)],  # fair_high
-            'p80': sorted_prices[percentile_idx(0.80)],  # premium
-            'p90': sorted_prices[percentile_idx(0.90)],
-            'mean': int(statistics.mean(sorted_prices))
-        }
+        # Prices are positive, so floor division matches int(statistics.mean(...)) exactly
+        return Percentiles(*(int(v) for v in ranked), int(prices.sum()) // n)
     
     def _compute_confidence_score(
         self,
-        price_points: List[Dict],
-        percentiles: Dict[str, Optional[int]],
+        percentiles: Percentiles,
         comp_count: int,
+        sold_count: int,
+        ask_count: int,
+        avg_match_strength: Optional[float],
+        avg_weighted_reputation: Optional[float],
         attribution: Optional[Dict] = None
     ) -> int:
         """Compute confidence score (1-10) based on various factors.
         
         Args:
-            price_points: List of price point dictionaries
             percentiles: Computed percentiles
             comp_count: Number of comps used
+            sold_count: Number of sold comps
+            ask_count: Number of ask comps
+            avg_match_strength: Mean match_strength, or None if no comp has one
+            avg_weighted_reputation: Match-weighted mean source reputation, or None
+            attribution: Attribution with condition flags
             
         Returns:
             Confidence score from 1-10
@@ -127,76 +176,37 @@ class ValuationEngine:
         score = 0
         max_score = 10
         
-        # Factor 1: Number of comps (0-3 points)
-        if comp_count >= 20:
-            score += 3
-        elif comp_count >= 10:
-            score += 2
-        elif comp_count >= 5:
-            score += 1
+        # Factor 1: Number of comps (0-3 points: 5+, 10+, 20+)
+        score += _COMP_COUNT_POINTS[bisect_right(_COMP_COUNT_THRESHOLDS, comp_count)]
         
         # Factor 2: Match strength (0-2 points) - reward high match_strength
-        match_strengths = [pp.get('match_strength', 1.0) for pp in price_points if pp.get('match_strength') is not None]
-        if match_strengths:
-            avg_match_strength = sum(match_strengths) / len(match_strengths)
+        if avg_match_strength is not None:
             score += int(avg_match_strength * 2)
         
         # Factor 2b: Source reputation (weighted by match_strength)
-        weighted_reputation = 0.0
-        total_weight = 0.0
-        for pp in price_points:
-            source_id = pp.get('source_id')
-            match_strength = pp.get('match_strength', 1.0)
-            if source_id and source_id in self.sources:
-                rep_weight = float(self.sources[source_id].get('reputation_weight', 1.0))
-                weighted_reputation += rep_weight * match_strength
-                total_weight += match_strength
-        
-        if total_weight > 0:
-            avg_weighted_reputation = weighted_reputation / total_weight
+        if avg_weighted_reputation is not None:
             # Add up to 1 point based on weighted reputation
             score += int(avg_weighted_reputation)
         
-        # Factor 3: Sold vs Ask ratio (0-2 points)
-        sold_count = sum(1 for pp in price_points if pp.get('price_type') == 'sold')
-        ask_count = sum(1 for pp in price_points if pp.get('price_type') == 'ask')
+        # Factor 3: Sold vs Ask ratio (0-2 points: 50%+, 80%+ sold)
         total_count = sold_count + ask_count
         
         if total_count > 0:
-            sold_ratio = sold_count / total_count
-            if sold_ratio >= 0.8:
-                score += 2
-            elif sold_ratio >= 0.5:
-                score += 1
+            score += _SOLD_RATIO_POINTS[bisect_right(_SOLD_RATIO_THRESHOLDS, sold_count / total_count)]
         
         # Cap confidence at 7 if only ASK comps exist (no sold comps)
         if sold_count == 0:
             score = min(score, 7)
         
-        # Factor 4: Price spread tightness (0-3 points)
-        if percentiles['median'] and percentiles['p10'] and percentiles['p90']:
-            spread_ratio = (percentiles['p90'] - percentiles['p10']) / percentiles['median']
-            if spread_ratio < 0.2:  # Very tight spread (<20%)
-                score += 3
-            elif spread_ratio < 0.4:  # Tight spread (<40%)
-                score += 2
-            elif spread_ratio < 0.6:  # Moderate spread (<60%)
-                score += 1
-            # Wide spread penalizes confidence (no points added)
+        # Factor 4: Price spread tightness (0-3 points: under 60%, 40%, 20%);
+        # wide spread penalizes confidence (no points added)
+        if percentiles.median and percentiles.p10 and percentiles.p90:
+            spread_ratio = (percentiles.p90 - percentiles.p10) / percentiles.median
+            score += _SPREAD_RATIO_POINTS[bisect_right(_SPREAD_RATIO_THRESHOLDS, spread_ratio)]
         
         # Factor 5: Condition flags penalty (from attribution)
         if attribution:
-            condition_penalties = 0
-            if attribution.get('cleaned'):
-                condition_penalties += 1
-            if attribution.get('scratches'):
-                condition_penalties += 1
-            if attribution.get('rim_damage'):
-                condition_penalties += 1
-            if attribution.get('details_damaged'):
-                condition_penalties += 1
-            if attribution.get('harsh_cleaning'):
-                condition_penalties += 1
+            condition_penalties = sum(1 for flag in CONDITION_FLAGS if attribution.get(flag))
             # Reduce score by condition penalties (up to -3 points)
             score -= min(condition_penalties, 3)
         
@@ -212,7 +222,7 @@ class ValuationEngine:
         ask_count: int,
         comp_sources_count: int,
         confidence_score: int,
-        percentiles: Dict[str, Optional[int]]
+        percentiles: Percentiles
     ) -> str:
         """Generate human-readable explanation of valuation.
         
@@ -227,30 +237,25 @@ class ValuationEngine:
         Returns:
             Explanation string
         """
-        parts = []
-        
-        parts.append(f"Valuation based on {comp_count} comparable listings")
-        if comp_sources_count > 1:
-            parts.append(f"from {comp_sources_count} sources")
-        
-        if sold_count > 0:
-            parts.append(f"({sold_count} sold, {ask_count} asking)")
-        
-        if percentiles['median']:
-            parts.append(f"\nMedian: ${percentiles['median']/100:.2f}")
-            if percentiles['p10'] and percentiles['p90']:
-                parts.append(f"Range (10th-90th percentile): ${percentiles['p10']/100:.2f} - ${percentiles['p90']/100:.2f}")
-        
-        parts.append(f"\nConfidence Score: {confidence_score}/10")
-        
         if confidence_score >= 8:
-            parts.append("(High confidence - strong comp data)")
+            confidence_label = "High confidence - strong comp data"
         elif confidence_score >= 5:
-            parts.append("(Moderate confidence - reasonable comp data)")
+            confidence_label = "Moderate confidence - reasonable comp data"
         else:
-            parts.append("(Low confidence - limited or mixed comp data)")
-        
-        return " ".join(parts)
+            confidence_label = "Low confidence - limited or mixed comp data"
+        
+        sources_part = f" from {comp_sources_count} sources" if comp_sources_count > 1 else ""
+        counts_part = f" ({sold_count} sold, {ask_count} asking)" if sold_count > 0 else ""
+        price_part = ""
+        if percentiles.median:
+            price_part = f" \nMedian: ${percentiles.median/100:.2f}"
+            if percentiles.p10 and percentiles.p90:
+                price_part += f" Range (10th-90th percentile): ${percentiles.p10/100:.2f} - ${percentiles.p90/100:.2f}"
+        
+        return (
+            f"Valuation based on {comp_count} comparable listings{sources_part}{counts_part}{price_part}"
+            f" \nConfidence Score: {confidence_score}/10 ({confidence_label})"
+        )
     
     def compute_valuation(self, price_points: List[Dict], attribution: Optional[Dict] = None) -> Dict:
         """Compute valuation from price points.
@@ -261,44 +266,141 @@ class ValuationEngine:
         Returns:
             Valuation dictionary
         """
-        # Filter out marked as filtered
-        valid_points = [pp for pp in price_points if not pp.get('filtered_out', False)]
-        
-        if not valid_points:
-            logger.warning("No valid price points for valuation")
-            return {
-                'price_cents_p10': None,
-                'price_cents_median': None,
-                'price_cents_p90': None,
-                'price_cents_mean': None,
-                'confidence_score': 1,
-                'explanation': 'No valid comparable listings found.',
-                'comp_count': 0,
-                'comp_sources_count': 0,
-                'sold_count': 0,
-                'ask_count': 0
-            }
+        # One pass over the comps gathers everything below (prices, counts,
+        # sources, match strength and reputation sums)
+        prices = array.array('q')
+        type_counts = {'sold': 0, 'ask': 0}
+        unique_sources = set()
+        match_strength_sum = 0
+        match_strength_count = 0
+        weighted_reputation = 0.0
+        total_weight = 0.0
+        valid_count = 0
+        sources = self.sources
+        for pp in price_points:
+            # Skip comps marked as filtered
+            if pp.get('filtered_out', False):
+                continue
+            valid_count += 1
+            price_cents = pp.get('price_cents')
+            if price_cents:
+                prices.append(price_cents)
+            price_type = pp.get('price_type')
+            if price_type in type_counts:
+                type_counts[price_type] += 1
+            if pp.get('match_strength') is not None:
+                match_strength_sum += pp['match_strength']
+                match_strength_count += 1
+            source_id = pp.get('source_id')
+            if source_id:
+                unique_sources.add(source_id)
+                if source_id in sources:
+                    match_strength = pp.get('match_strength', 1.0)
+                    weighted_reputation += float(sources[source_id].get('reputation_weight', 1.0)) * match_strength
+                    total_weight += match_strength
+        
+        if not valid_count:
+            return self._empty_valuation()
+        
+        return self._build_valuation(
+            np.frombuffer(prices, dtype=np.int64),
+            sold_count=type_counts['sold'],
+            ask_count=type_counts['ask'],
+            comp_sources_count=len(unique_sources),
+            avg_match_strength=match_strength_sum / match_strength_count if match_strength_count else None,
+            avg_weighted_reputation=weighted_reputation / total_weight if total_weight > 0 else None,
+            attribution=attribution
+        )
+    
+    def compute_valuation_from_inputs(self, inputs: Dict, attribution: Optional[Dict] = None) -> Dict:
+        """Compute valuation from the server-side aggregate of an intake's comps.
         
-        # Extract prices
-        prices = [pp['price_cents'] for pp in valid_points if pp.get('price_cents')]
+        Args:
+            inputs: Result of the compute_valuation_inputs RPC: comp_count,
+                prices (sorted), sold_count, ask_count, match_strength_sum,
+                match_strength_count and sources (source_id -> match strength sum);
+                or of valuation_percentiles, which has percentiles, price_count
+                and filtered_count in place of prices
+            attribution: Attribution dictionary for condition flag penalties
+            
+        Returns:
+            Valuation dictionary
+        """
+        if not inputs.get('comp_count'):
+            return self._empty_valuation()
         
+        weighted_reputation = 0.0
+        total_weight = 0.0
+        for source_id, match_strength in inputs['sources'].items():
+            if source_id in self.sources:
+                weighted_reputation += float(self.sources[source_id].get('reputation_weight', 1.0)) * match_strength
+                total_weight += match_strength
+        
+        match_strength_count = inputs['match_strength_count']
+        stats = dict(
+            sold_count=inputs['sold_count'],
+            ask_count=inputs['ask_count'],
+            comp_sources_count=len(inputs['sources']),
+            avg_match_strength=inputs['match_strength_sum'] / match_strength_count if match_strength_count else None,
+            avg_weighted_reputation=weighted_reputation / total_weight if total_weight > 0 else None,
+            attribution=attribution
+        )
+        if 'percentiles' in inputs:
+            # valuation_percentiles RPC: outliers already filtered and ranked in SQL
+            ranked = inputs['percentiles']
+            return self._assemble_valuation(
+                Percentiles(**ranked) if ranked else _NO_PERCENTILES,
+                comp_count=inputs['filtered_count'],
+                original_comp_count=inputs['price_count'],
+                **stats
+            )
+        return self._build_valuation(np.asarray(inputs['prices'], dtype=np.int64), **stats)
+    
+    def _empty_valuation(self) -> Dict:
+        logger.warning("No valid price points for valuation")
+        return {
+            'price_cents_p10': None,
+            'price_cents_median': None,
+            'price_cents_p90': None,
+            'price_cents_mean': None,
+            'confidence_score': 1,
+            'explanation': 'No valid comparable listings found.',
+            'comp_count': 0,
+            'comp_sources_count': 0,
+            'sold_count': 0,
+            'ask_count': 0
+        }
+    
+    def _build_valuation(self, prices: np.ndarray, sold_count: int, ask_count: int,
+                         comp_sources_count: int, avg_match_strength: Optional[float],
+                         avg_weighted_reputation: Optional[float],
+                         attribution: Optional[Dict]) -> Dict:
+        """Filter outliers, then score and explain the remaining prices."""
         # Filter outliers using IQR method (more robust than MAD for small datasets)
         filtered_prices = self._filter_outliers(prices, method='iqr')
         
         # Compute percentiles
         percentiles = self._compute_percentiles(filtered_prices)
         
-        # Count stats
-        comp_count = len(filtered_prices)
-        sold_count = sum(1 for pp in valid_points if pp.get('price_type') == 'sold')
-        ask_count = sum(1 for pp in valid_points if pp.get('price_type') == 'ask')
-        
-        # Get unique source count
-        unique_sources = set(pp.get('source_id') for pp in valid_points if pp.get('source_id'))
-        comp_sources_count = len(unique_sources)
-        
+        return self._assemble_valuation(
+            percentiles, len(filtered_prices), len(prices),
+            sold_count, ask_count, comp_sources_count,
+            avg_match_strength, avg_weighted_reputation, attribution
+        )
+    
+    def _assemble_valuation(self, percentiles: Percentiles, comp_count: int, original_comp_count: int,
+                            sold_count: int, ask_count: int, comp_sources_count: int,
+                            avg_match_strength: Optional[float],
+                            avg_weighted_reputation: Optional[float],
+                            attribution: Optional[Dict]) -> Dict:
+        """Score and explain already-computed percentiles."""
         # Compute confidence score
-        confidence_score = self._compute_confidence_score(valid_points, percentiles, comp_count, attribution=attribution)
+        confidence_score = self._compute_confidence_score(
+            percentiles, comp_count, sold_count, ask_count,
+            avg_match_strength=avg_match_strength,
+            avg_weighted_reputation=avg_weighted_reputation,
+            attribution=attribution
+        )
         
         # Generate explanation
         explanation = self._generate_explanation(
@@ -307,14 +409,14 @@ class ValuationEngine:
         )
         
         return {
-            'price_cents_p10': percentiles['p10'],
-            'price_cents_p20': percentiles.get('p20'),  # quick_sale
-            'price_cents_p40': percentiles.get('p40'),  # fair_low
-            'price_cents_median': percentiles['median'],  # fair_mid
-            'price_cents_p60': percentiles.get('p60'),  # fair_high
-            'price_cents_p80': percentiles.get('p80'),  # premium
-            'price_cents_p90': percentiles['p90'],
-            'price_cents_mean': percentiles['mean'],
+            'price_cents_p10': percentiles.p10,
+            'price_cents_p20': percentiles.p20,  # quick_sale
+            'price_cents_p40': percentiles.p40,  # fair_low
+            'price_cents_median': percentiles.median,  # fair_mid
+            'price_cents_p60': percentiles.p60,  # fair_high
+            'price_cents_p80': percentiles.p80,  # premium
+            'price_cents_p90': percentiles.p90,
+            'price_cents_mean': percentiles.mean,
             'confidence_score': confidence_score,
             'explanation': explanation,
             'comp_count': comp_count,
@@ -322,10 +424,17 @@ class ValuationEngine:
             'sold_count': sold_count,
             'ask_count': ask_count,
             'metadata': {
-                'original_comp_count': len(prices),
+                'original_comp_count': original_comp_count,
                 'filtered_comp_count': comp_count
             }
         }
 
 
+def compute_valuation(sources: List[Dict], price_points: List[Dict], attribution: Optional[Dict] = None) -> Dict:
+    """Module-level (picklable) entry point for running a valuation in another process."""
+    return ValuationEngine(sources=sources).compute_valuation(price_points, attribution=attribution)
+
 
+def compute_valuation_from_inputs(sources: List[Dict], inputs: Dict, attribution: Optional[Dict] = None) -> Dict:
+    """Module-level (picklable) counterpart of ValuationEngine.compute_valuation_from_inputs."""
+    return ValuationEngine(sources=sources).compute_valuation_from_inputs(inputs, attribution=attribution)
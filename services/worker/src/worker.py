@@ -1,32 +1,42 @@
 """Main worker loop."""
 import time
 import logging
+import random
+import re
 import sys
 import threading
-from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
 import structlog
 from src.config import settings
 from src.db import (
     claim_next_job, update_job_status, mark_job_retryable, log_job_event,
-    insert_price_points, get_source, get_source_rules, get_attribution,
-    upsert_valuation, update_job_heartbeat, reclaim_stuck_jobs, supabase,
-    upsert_worker_heartbeat, check_source_available, pause_source, get_source_pause_until,
-    mark_job_retryable_in
+    insert_price_points, get_source, get_sources_bulk, get_source_exclude_keywords, get_attribution,
+    upsert_valuation, register_job, unregister_job, get_supabase,
+    upsert_worker_heartbeat, check_source_available, pause_source, disable_source, get_source_pause_remaining,
+    mark_job_retryable_in, close_clients, flush_heartbeats, wait_for_new_job, complete_job,
+    submit_db, worker_tick, begin_job_scope, end_job_scope, VALUATION_PRICE_POINT_COLUMNS,
+    DatabaseUnavailableError, TTLCache, mark_valuation_dirty, claim_dirty_valuations,
+    get_valuation_inputs
 )
 from src.collectors.ebay import EbayCollector, EbayRateLimitError
-from src.valuation import ValuationEngine
+from src.valuation import (
+    ValuationEngine, compute_valuation, compute_valuation_from_inputs, valuation_fingerprint
+)
 
 # Configure Python logging to output to stderr (Docker captures this)
+_log_level = getattr(logging, settings.log_level.upper(), logging.INFO)
 logging.basicConfig(
     format="%(message)s",
     stream=sys.stderr,
-    level=logging.INFO,
+    level=_log_level,
 )
 
-# Configure structured logging
+# Configure structured logging. The filtering wrapper turns calls below the
+# level into no-ops before any event dict or processor work happens (hot-path
+# debug lines such as the per-tick heartbeat flush).
 structlog.configure(
     processors=[
-        structlog.stdlib.filter_by_level,
         structlog.stdlib.add_logger_name,
         structlog.stdlib.add_log_level,
         structlog.stdlib.PositionalArgumentsFormatter(),
@@ -38,12 +48,58 @@ structlog.configure(
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    wrapper_class=structlog.make_filtering_bound_logger(_log_level),
     cache_logger_on_first_use=True,
 )
 
 logger = structlog.get_logger()
 
+# Error messages that mean "try again later" rather than "this job is broken"
+_RETRYABLE_ERROR_RE = re.compile(r"timeout|connection|temporary|rate limit|429|50[234]", re.IGNORECASE)
+# Backoff for jobs requeued by the worker itself (source paused or rate limited)
+RETRY_BASE_SECONDS = 60
+RETRY_CAP_SECONDS = 3600
+
+
+def _retry_delay(attempt: int, not_before: float = 0) -> int:
+    """Seconds until a requeued job's retry: not_before plus decorrelated jitter.
+    
+    The jitter is uniform in [base, base * 3**attempt] (capped), so jobs that
+    failed together (a source going down, a rate limit lifting) come back
+    spread out rather than at the same instant, and further apart each attempt.
+    """
+    spread = min(RETRY_CAP_SECONDS, RETRY_BASE_SECONDS * 3 ** min(max(attempt, 1), 8))
+    return int(not_before + random.uniform(RETRY_BASE_SECONDS, spread))
+
+
+# Credential values copied from env.example or docs rather than real eBay keys
+_PLACEHOLDER_CREDENTIAL_RE = re.compile(
+    r"your-ebay-app-id|your-ebay-cert-id|your-ebay-dev-id|placeholder|example", re.IGNORECASE
+)
+
+# intake_id -> (input fingerprint, valuation) of the last valuation this process
+# wrote; bounded in age so writes made elsewhere are eventually overwritten again
+_valuation_cache = TTLCache(maxsize=4096, ttl=settings.valuation_cache_ttl_seconds)
+
+# frozenset(source_ids) -> ValuationEngine; expires with the source cache so
+# reputation weight changes are picked up on the same schedule
+_engine_cache = TTLCache(maxsize=32, ttl=settings.source_cache_ttl_seconds)
+
+
+def _engine_for(source_ids: frozenset) -> ValuationEngine:
+    """Return a ValuationEngine for this source mix, reusing one built for an earlier job.
+    
+    The engine holds only the source lookup, so it is safe to share across
+    jobs and threads. An engine missing some of the sources (e.g. the bulk
+    read failed) is used for this job only, not cached.
+    """
+    hit, engine = _engine_cache.get(source_ids)
+    if not hit:
+        engine = ValuationEngine(sources=get_sources_bulk(source_ids) if source_ids else [])
+        if len(engine.sources) == len(source_ids):
+            _engine_cache.set(source_ids, engine)
+    return engine
+
 
 def get_collector(source: dict):
     """Get collector instance for a source.
@@ -70,9 +126,7 @@ def get_collector(source: dict):
             return None
         
         # Check for placeholder credentials
-        placeholder_patterns = ['your-ebay-app-id', 'your-ebay-cert-id', 'your-ebay-dev-id', 'placeholder', 'example']
-        app_id_lower = app_id.lower()
-        if any(pattern in app_id_lower for pattern in placeholder_patterns):
+        if _PLACEHOLDER_CREDENTIAL_RE.search(app_id):
             logger.error("eBay App ID appears to be a placeholder value", 
                         source_id=source['id'], 
                         app_id=app_id[:20] + '...' if len(app_id) > 20 else app_id)
@@ -118,41 +172,37 @@ def process_job(job: dict):
     intake_id = job['intake_id']
     source_id = job['source_id']
     query_params = job.get('query_params', {})
+    attempt = (job.get('attempts') or 0) + 1
     
-    start_time = datetime.now()
-    logger.info("Processing job", job_id=job_id, intake_id=intake_id, source_id=source_id, worker_id=settings.worker_id, job_type=job_type)
+    start_time = time.monotonic()
+    # Job context is bound once instead of being passed to every log call
+    log = logger.bind(job_id=job_id, intake_id=intake_id, source_id=source_id, worker_id=settings.worker_id)
+    log.info("Processing job", job_type=job_type)
     
-    # Start heartbeat thread FIRST (before any early returns)
-    heartbeat_stop = threading.Event()
-    heartbeat_thread = threading.Thread(
-        target=_heartbeat_loop,
-        args=(job_id, heartbeat_stop),
-        daemon=True
-    )
-    heartbeat_thread.start()
+    # Register for heartbeats FIRST (before any early returns); the worker tick
+    # thread writes them for all active jobs in one RPC
+    register_job(job_id)
+    scope_token = begin_job_scope()
     
     try:
+        # Fetch attribution (always, for keywords) and source rules while the
+        # source itself is loaded, instead of three sequential round-trips
+        attribution_future = submit_db(get_attribution, intake_id)
+        source_excludes_future = submit_db(get_source_exclude_keywords, source_id)
+        
         # Get source configuration
         source = get_source(source_id)
         if not source:
             raise Exception(f"Source not found: {source_id}")
         
         if not source.get('enabled'):
-            logger.warning("Source is disabled", source_id=source_id)
+            log.warning("Source is disabled")
             update_job_status(job_id, 'failed', 'Source is disabled')
             return
         
-        # Get attribution (always fetch to get keywords)
-        attribution = get_attribution(intake_id)
-        
-        # Get source rules (exclude keywords, etc.)
-        rules = get_source_rules(source_id)
-        source_exclude_keywords = [
-            r['rule_value'] for r in rules
-            if r['rule_type'] == 'exclude_keywords' and r['active']
-        ]
-        # Normalize source-level exclude keywords (trim, lowercase)
-        source_exclude_keywords = [k.strip().lower() for k in source_exclude_keywords if k and k.strip()]
+        attribution = attribution_future.result()
+        # Source-level exclude keywords (normalized and cached with the rules)
+        source_exclude_keywords = source_excludes_future.result()
         
         # Get intake-level keywords from attribution
         intake_keywords_exclude = attribution.get('keywords_exclude', []) if attribution else []
@@ -169,7 +219,7 @@ def process_job(job: dict):
         intake_keywords_include = [str(k).strip().lower() for k in intake_keywords_include if k]
         
         # Merge intake-level and source-level exclude keywords
-        all_exclude_keywords = list(set(source_exclude_keywords + intake_keywords_exclude))
+        all_exclude_keywords = list(source_exclude_keywords.union(intake_keywords_exclude))
         
         # Build query_params if not already provided (from enqueue_jobs RPC)
         if not query_params or 'title' not in query_params:
@@ -212,11 +262,8 @@ def process_job(job: dict):
             if source.get("adapter_type") == "ebay_api" and (
                 "Authentication failed" in msg or "Invalid Application" in msg or "AppID" in msg
             ):
-                logger.error("eBay API authentication failed", error=msg)
-                try:
-                    supabase.table("sources").update({"enabled": False}).eq("id", source_id).execute()
-                except Exception:
-                    pass
+                log.error("eBay API authentication failed", error=msg)
+                disable_source(source_id, reason=f"eBay API authentication failed: {msg}")
                 raise Exception(
                     "eBay API authentication failed: "
                     f"{msg}. Please check your eBay App ID in the source configuration."
@@ -226,151 +273,229 @@ def process_job(job: dict):
         # If we got nothing AND the source is paused, this should not be "succeeded".
         if not price_points:
             if not check_source_available(source_id):
-                paused_until = get_source_pause_until(source_id)  # ISO string or None
-                delay = 300
+                pause_remaining = get_source_pause_remaining(source_id)  # seconds or None
+                delay = _retry_delay(attempt)
                 msg = "Source unavailable (paused or disabled)"
-                if paused_until:
-                    try:
-                        pu = datetime.fromisoformat(paused_until.replace('Z', '+00:00'))
-                        now = datetime.now(timezone.utc)
-                        delay = max(30, int((pu - now).total_seconds()))
-                        msg = f"Source paused until {paused_until}"
-                    except Exception:
-                        pass
-                logger.warning("Source unavailable, scheduling retry", source_id=source_id, paused_until=paused_until, delay_seconds=delay)
-                mark_job_retryable_in(job_id, delay_seconds=delay, error_message=msg)
+                if pause_remaining:
+                    delay = _retry_delay(attempt, not_before=max(30, pause_remaining))
+                    msg = f"Source paused for {pause_remaining}s"
+                log.warning("Source unavailable, scheduling retry", pause_remaining=pause_remaining, delay_seconds=delay)
+                mark_job_retryable_in(job_id, delay_seconds=delay, error_message=msg, attempts=attempt)
                 return
         
         if not price_points:
-            logger.warning("No price points collected", job_id=job_id)
-            log_job_event(job_id, 'warning', 'No price points collected')
-            update_job_status(job_id, 'succeeded', None)
+            log.warning("No price points collected")
+            complete_job(job_id, 'succeeded', log={
+                'level': 'warning', 'message': 'No price points collected'
+            })
             return
         
         # Insert price points
         log_job_event(job_id, 'info', f'Collected {len(price_points)} price points')
         insert_price_points(price_points)
         
-        # Compute valuation
-        log_job_event(job_id, 'info', 'Computing valuation')
-        
-        # Get all price points for this intake (from all sources/jobs)
-        all_price_points_result = supabase.table("price_points") \
-            .select("*") \
-            .eq("intake_id", intake_id) \
-            .eq("filtered_out", False) \
-            .execute()
-        
-        all_price_points = all_price_points_result.data if all_price_points_result.data else []
-        
-        # Get sources for reputation weighting
-        source_ids = list(set(pp.get('source_id') for pp in all_price_points if pp.get('source_id')))
-        sources = []
-        for sid in source_ids:
-            s = get_source(sid)
-            if s:
-                sources.append(s)
-        
-        # Get attribution for condition flag penalties
-        attribution = get_attribution(intake_id)
-        
-        # Compute valuation
-        engine = ValuationEngine(sources=sources)
-        valuation = engine.compute_valuation(all_price_points, attribution=attribution)
-        
-        # Upsert valuation
-        upsert_valuation(intake_id, valuation)
-        logger.info("Valuation upserted",
-                   job_id=job_id,
-                   intake_id=intake_id,
-                   confidence_score=valuation['confidence_score'],
-                   comp_count=valuation['comp_count'])
-        
-        log_job_event(job_id, 'info', 'Valuation computed', {
-            'confidence_score': valuation['confidence_score'],
-            'comp_count': valuation['comp_count']
-        })
-        
-        # Mark job as succeeded
-        duration_ms = int((datetime.now() - start_time).total_seconds() * 1000)
-        update_job_status(job_id, 'succeeded', None)
-        logger.info("Job succeeded", 
-                   job_id=job_id, 
-                   intake_id=intake_id, 
-                   source_id=source_id,
-                   duration_ms=duration_ms,
-                   worker_id=settings.worker_id)
+        if settings.valuation_debounce_seconds > 0 and mark_valuation_dirty(intake_id):
+            # Coalesced: the valuation loop recomputes this intake once its
+            # burst of source jobs has settled
+            duration_ms = int((time.monotonic() - start_time) * 1000)
+            complete_job(job_id, 'succeeded', log={
+                'level': 'info', 'message': 'Valuation queued'
+            })
+        else:
+            # Compute valuation
+            log_job_event(job_id, 'info', 'Computing valuation')
+            valuation = _recompute_valuation(intake_id, job_id=job_id)
+            
+            # Mark job as succeeded (with its closing log line, in one transaction)
+            duration_ms = int((time.monotonic() - start_time) * 1000)
+            complete_job(job_id, 'succeeded', log={
+                'level': 'info',
+                'message': 'Valuation computed',
+                'metadata': {
+                    'confidence_score': valuation['confidence_score'],
+                    'comp_count': valuation['comp_count']
+                }
+            })
+        log.info("Job succeeded", duration_ms=duration_ms)
         
     except EbayRateLimitError as e:
         # Pause the source for a while, then retry the job later.
         pause_source(source_id, seconds=3600, reason=str(e))  # 1 hour backoff
-        logger.warning("Rate limited by eBay, pausing source and retrying later", source_id=source_id)
-        mark_job_retryable_in(job_id, delay_seconds=3600, error_message=str(e))
+        log.warning("Rate limited by eBay, pausing source and retrying later")
+        mark_job_retryable_in(job_id, delay_seconds=_retry_delay(attempt, not_before=3600),
+                              error_message=str(e), attempts=attempt)
         return
     except Exception as e:
         error_msg = str(e)
-        logger.error("Job failed", job_id=job_id, error=error_msg)
+        log.error("Job failed", error=error_msg)
 
         # Mark job as retryable for transient errors
-        retryable = (
-            "timeout" in error_msg.lower()
-            or "connection" in error_msg.lower()
-            or "temporary" in error_msg.lower()
-            or "rate limit" in error_msg.lower()
-            or "429" in error_msg
-        )
+        retryable = _RETRYABLE_ERROR_RE.search(error_msg) is not None
 
         status = "retryable" if retryable else "failed"
-        log_job_event(job_id, "error", f"Job {status}", {"error": error_msg})
-        update_job_status(job_id, status, error_msg)
+        complete_job(job_id, status, error_msg, log={
+            "level": "error", "message": f"Job {status}", "metadata": {"error": error_msg}
+        })
     
     finally:
-        # Always stop heartbeat thread, even on early returns or exceptions
-        heartbeat_stop.set()
-        heartbeat_thread.join(timeout=2)
-        if heartbeat_thread.is_alive():
-            logger.warning("Heartbeat thread did not stop within timeout", job_id=job_id)
+        # Always stop heartbeating, even on early returns or exceptions
+        unregister_job(job_id)
+        end_job_scope(scope_token)
+
+
+# Below this many comps, pickling to a worker process costs more than the compute
+VALUATION_PROCESS_MIN_POINTS = 2000
+_valuation_pool: Optional[ProcessPoolExecutor] = None
+_valuation_pool_lock = threading.Lock()
+
+
+def _get_valuation_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the shared valuation process pool, or None if valuation_workers is 0."""
+    global _valuation_pool
+    if settings.valuation_workers <= 0:
+        return None
+    if _valuation_pool is None:
+        with _valuation_pool_lock:
+            if _valuation_pool is None:
+                _valuation_pool = ProcessPoolExecutor(max_workers=settings.valuation_workers)
+    return _valuation_pool
 
 
-def _heartbeat_loop(job_id: str, stop_event: threading.Event):
-    """Background thread to update job heartbeat.
+def _recompute_valuation(intake_id: str, job_id: str = None, require_write: bool = False) -> dict:
+    """Recompute and upsert an intake's valuation from all of its price points.
     
     Args:
-        job_id: Job ID to update heartbeat for
-        stop_event: Event to signal thread to stop
+        intake_id: Intake to value
+        job_id: Job that triggered the recompute, for logging (None when deferred)
+        require_write: Raise if the upsert fails instead of only logging it
+        
+    Returns:
+        The valuation dictionary
+    """
+    # Aggregated server-side when migration 052 (or, with the SQL percentile
+    # fast path, 053) is applied; otherwise every unfiltered price point for
+    # this intake (from all sources/jobs)
+    inputs = get_valuation_inputs(intake_id, percentiles=settings.sql_percentile_fast_path)
+    if inputs is not None:
+        price_points = None
+        point_count = len(inputs.get('prices', ()))
+        source_ids = frozenset(inputs['sources'])
+    else:
+        all_price_points_result = get_supabase().table("price_points") \
+            .select(VALUATION_PRICE_POINT_COLUMNS) \
+            .eq("intake_id", intake_id) \
+            .eq("filtered_out", False) \
+            .execute()
+        price_points = all_price_points_result.data if all_price_points_result.data else []
+        point_count = len(price_points)
+        source_ids = frozenset(pp['source_id'] for pp in price_points if pp.get('source_id'))
+    
+    # Get sources for reputation weighting
+    engine = _engine_for(source_ids)
+    sources = list(engine.sources.values())
+    
+    # Get attribution for condition flag penalties (served from the job scope)
+    attribution = get_attribution(intake_id)
+    
+    # Skip compute and upsert if this process already wrote a valuation
+    # from exactly these inputs (e.g. a job that added no new comps)
+    fingerprint = valuation_fingerprint(inputs if price_points is None else price_points, sources, attribution)
+    hit, cached = _valuation_cache.get(intake_id)
+    if hit and cached[0] == fingerprint:
+        logger.info("Valuation unchanged, skipping upsert", job_id=job_id, intake_id=intake_id)
+        return cached[1]
+    
+    # Compute valuation (large intakes off the GIL when a process pool is configured)
+    pool = _get_valuation_pool() if point_count >= VALUATION_PROCESS_MIN_POINTS else None
+    if price_points is None:
+        if pool is not None:
+            valuation = pool.submit(compute_valuation_from_inputs, sources, inputs, attribution).result()
+        else:
+            valuation = engine.compute_valuation_from_inputs(inputs, attribution=attribution)
+    elif pool is not None:
+        valuation = pool.submit(compute_valuation, sources, price_points, attribution).result()
+    else:
+        valuation = engine.compute_valuation(price_points, attribution=attribution)
+    
+    # Upsert valuation
+    if upsert_valuation(intake_id, valuation):
+        _valuation_cache.set(intake_id, (fingerprint, valuation))
+    elif require_write:
+        raise Exception(f"Failed to upsert valuation for intake {intake_id}")
+    logger.info("Valuation upserted",
+               job_id=job_id,
+               intake_id=intake_id,
+               confidence_score=valuation['confidence_score'],
+               comp_count=valuation['comp_count'])
+    return valuation
+
+
+def _valuation_loop(stop_event: threading.Event):
+    """Recompute valuations for intakes marked dirty by finished jobs.
+    
+    Runs only when valuation_debounce_seconds > 0. Each claimed intake is
+    recomputed once however many jobs marked it; a failed recompute puts the
+    intake back in the queue.
     """
-    heartbeat_interval = 20  # Update heartbeat every 20 seconds
     while not stop_event.is_set():
-        try:
-            update_job_heartbeat(job_id)
-        except Exception as e:
-            logger.error("Failed to update heartbeat", job_id=job_id, error=str(e))
-        
-        # Wait for interval or stop signal
-        stop_event.wait(heartbeat_interval)
+        for intake_id in claim_dirty_valuations():
+            scope_token = begin_job_scope()
+            try:
+                _recompute_valuation(intake_id, require_write=True)
+            except Exception as e:
+                logger.error("Deferred valuation failed", intake_id=intake_id, error=str(e))
+                mark_valuation_dirty(intake_id)
+            finally:
+                end_job_scope(scope_token)
+        stop_event.wait(settings.valuation_debounce_seconds)
 
 
 def _worker_heartbeat_loop(stop_event: threading.Event):
-    """Independent background thread to update worker heartbeat (not tied to jobs).
+    """Independent background thread for the periodic worker tick.
     
-    Runs every 30 seconds regardless of job activity.
+    Queues the worker heartbeat every 30 seconds regardless of job activity,
+    every heartbeat_flush_interval_seconds writes all buffered worker and job
+    heartbeats in one RPC, and every 60 seconds folds the stuck-job reclaim
+    into that same RPC.
     
     Args:
         stop_event: Event to signal thread to stop
     """
     heartbeat_interval = 30  # Update worker heartbeat every 30 seconds
+    reclaim_check_interval = 60  # Check for stuck jobs every 60 seconds
+    last_worker_heartbeat = None
+    last_reclaim_check = time.monotonic()
+    next_tick = last_reclaim_check
     while not stop_event.is_set():
         try:
-            # Get optional metadata (can be extended with version, hostname, etc.)
-            meta = {
-                'worker_id': settings.worker_id
-            }
-            upsert_worker_heartbeat(settings.worker_id, meta)
+            now = time.monotonic()
+            if last_worker_heartbeat is None or now - last_worker_heartbeat >= heartbeat_interval:
+                # Get optional metadata (can be extended with version, hostname, etc.)
+                meta = {
+                    'worker_id': settings.worker_id
+                }
+                upsert_worker_heartbeat(settings.worker_id, meta)
+                last_worker_heartbeat = now
+            reclaim = now - last_reclaim_check >= reclaim_check_interval
+            reclaimed = worker_tick(reclaim=reclaim)
+            if reclaim:
+                last_reclaim_check = now
+                if reclaimed > 0:
+                    logger.info("Reclaimed stuck jobs", count=reclaimed, worker_id=settings.worker_id)
         except Exception as e:
-            logger.error("Failed to upsert worker heartbeat", worker_id=settings.worker_id, error=str(e))
+            logger.error("Worker tick failed", worker_id=settings.worker_id, error=str(e))
         
-        # Wait for interval or stop signal
-        stop_event.wait(heartbeat_interval)
+        # Wait for the next tick or stop signal. Ticks are scheduled on a
+        # monotonic deadline so a slow RPC does not push every later tick back;
+        # after a stall, skip the missed ticks rather than firing them back to back
+        next_tick += settings.heartbeat_flush_interval_seconds
+        now = time.monotonic()
+        if next_tick < now:
+            next_tick = now
+        stop_event.wait(next_tick - now)
+    
+    # Push out anything queued since the last tick
+    flush_heartbeats()
 
 
 def run_worker():
@@ -386,34 +511,64 @@ def run_worker():
     )
     worker_heartbeat_thread.start()
     logger.info("Worker heartbeat thread started", worker_id=settings.worker_id)
-    
-    # Track last reclaim check time
-    last_reclaim_check = datetime.now()
-    reclaim_check_interval = 60  # Check for stuck jobs every 60 seconds
-    
+
+    # Deferred valuation recompute (only when jobs defer it)
+    valuation_stop = threading.Event()
+    valuation_thread = None
+    if settings.valuation_debounce_seconds > 0:
+        valuation_thread = threading.Thread(
+            target=_valuation_loop,
+            args=(valuation_stop,),
+            daemon=True
+        )
+        valuation_thread.start()
+
+    # Warm the shared eBay connection pool so the first job skips the TLS handshake
+    try:
+        EbayCollector(sandbox=settings.ebay_sandbox).prewarm()
+    except Exception as e:
+        logger.warning("Failed to prewarm eBay connection", error=str(e))
+
+    # Up to worker_concurrency jobs in flight; 1 keeps the original inline loop
+    concurrency = max(1, settings.worker_concurrency)
+    job_slots = threading.BoundedSemaphore(concurrency)
+    job_executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job") \
+        if concurrency > 1 else None
+
+    # Stuck-job reclaim runs on the worker tick thread, sharing the heartbeat RPC
     try:
         while True:
             try:
-                # Periodically check for stuck jobs
-                now = datetime.now()
-                if (now - last_reclaim_check).total_seconds() >= reclaim_check_interval:
-                    reclaimed = reclaim_stuck_jobs()
-                    if reclaimed > 0:
-                        logger.info("Reclaimed stuck jobs", count=reclaimed, worker_id=settings.worker_id)
-                    last_reclaim_check = now
-                
-                # Atomically claim the next available job
-                job = claim_next_job(settings.worker_id)
+                # Wait for a free job slot, then atomically claim the next available job
+                job_slots.acquire()
+                try:
+                    job = claim_next_job(settings.worker_id)
+                except BaseException:
+                    job_slots.release()
+                    raise
                 
                 if job:
-                    # Process the claimed job
-                    process_job(job)
-                    # Small delay after processing
-                    time.sleep(1)
+                    if job_executor is None:
+                        # Process the claimed job
+                        try:
+                            process_job(job)
+                        finally:
+                            job_slots.release()
+                        # Small delay after processing
+                        time.sleep(1)
+                    else:
+                        # Overlap this job's network waits with the others in flight
+                        future = job_executor.submit(process_job, job)
+                        future.add_done_callback(lambda _: job_slots.release())
                 else:
-                    # No jobs available, wait before next poll
-                    time.sleep(settings.poll_interval_seconds)
+                    job_slots.release()
+                    # No jobs available: sleep until one is announced (or poll interval)
+                    wait_for_new_job(settings.poll_interval_seconds)
                 
+            except DatabaseUnavailableError:
+                # Breaker open after repeated transient failures: wait it out quietly
+                logger.warning("Database unavailable, backing off", worker_id=settings.worker_id)
+                time.sleep(settings.poll_interval_seconds)
             except KeyboardInterrupt:
                 logger.info("Worker stopped by user", worker_id=settings.worker_id)
                 break
@@ -421,10 +576,19 @@ def run_worker():
                 logger.error("Worker error", error=str(e), worker_id=settings.worker_id, exc_info=True)
                 time.sleep(settings.poll_interval_seconds)
     finally:
+        if job_executor is not None:
+            # Let in-flight jobs finish (they keep heartbeating) before tearing down
+            job_executor.shutdown(wait=True)
+        valuation_stop.set()
+        if valuation_thread is not None:
+            valuation_thread.join(timeout=30)
+        if _valuation_pool is not None:
+            _valuation_pool.shutdown(wait=True)
         # Stop worker heartbeat thread on shutdown
         worker_heartbeat_stop.set()
         worker_heartbeat_thread.join(timeout=5)
         logger.info("Worker heartbeat thread stopped", worker_id=settings.worker_id)
+        close_clients()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""Test retry/backoff and the circuit breaker around database calls."""
+import sys
+import os
+from unittest.mock import patch
+
+import httpx
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_postgrest_session_retries_transient_status():
+    """Test that a 503 from PostgREST is retried and the eventual response returned."""
+    from src import db
+
+    statuses = [503, 503, 200]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), content=b'[{"ok": true}]')
+
+    client = db._OrjsonSyncClient(base_url='http://postgrest', transport=httpx.MockTransport(handler))
+    with patch.object(db, '_db_breaker', db._DbCircuitBreaker()), \
+         patch('src.db.time.sleep'):
+        response = client.post('/rpc/heartbeat_flush', json={})
+
+    assert response.status_code == 200
+    assert response.json() == [{"ok": True}]
+    assert statuses == []
+    print("✓ Transient PostgREST status retried")
+
+
+def test_circuit_breaker_opens_and_fails_fast():
+    """Test that repeated transient failures open the breaker and later calls skip the network."""
+    from src import db
+
+    calls = []
+
+    @db.retry_db(max_attempts=1)
+    def flaky():
+        calls.append(1)
+        raise httpx.ConnectError("connection refused")
+
+    with patch.object(db, '_db_breaker', db._DbCircuitBreaker(failure_threshold=3)):
+        for _ in range(3):
+            try:
+                flaky()
+            except httpx.ConnectError:
+                pass
+
+        try:
+            flaky()
+            assert False, "Expected DatabaseUnavailableError"
+        except db.DatabaseUnavailableError:
+            pass
+
+    assert len(calls) == 3, f"Expected 3 network attempts, got {len(calls)}"
+    print("✓ Circuit breaker opened after consecutive failures")
+
+
+if __name__ == "__main__":
+    try:
+        test_postgrest_session_retries_transient_status()
+        test_circuit_breaker_opens_and_fails_fast()
+        print("\n✓ All DB retry tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
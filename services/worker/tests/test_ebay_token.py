@@ -0,0 +1,56 @@
+"""Test single-flight OAuth token refresh in EbayCollector."""
+import sys
+import os
+import time
+import threading
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_concurrent_token_refresh_is_single_flight():
+    """Test that concurrent callers with an expired token trigger only one token POST."""
+    from src.collectors import ebay
+    from src.collectors.ebay import EbayCollector
+
+    ebay._token_cache.clear()
+    calls = []
+
+    def slow_request(self, client_id, client_secret):
+        calls.append(client_id)
+        time.sleep(0.2)  # Keep the refresh in flight while other threads arrive
+        return "fresh-token", time.time() + 3600
+
+    with patch('src.collectors.base.Cache'), \
+         patch.object(ebay.settings, 'ebay_client_id', 'test-client'), \
+         patch.object(ebay.settings, 'ebay_client_secret', 'test-secret'), \
+         patch.object(EbayCollector, '_request_app_token', slow_request):
+
+        collector = EbayCollector(source_id='test-source-id')
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(collector._get_app_token()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert results == ["fresh-token"] * 8
+        assert len(calls) == 1, f"Expected 1 token request, got {len(calls)}"
+
+    ebay._token_cache.clear()
+    print("✓ Concurrent token refresh issued a single request")
+
+
+if __name__ == "__main__":
+    try:
+        test_concurrent_token_refresh_is_single_flight()
+        print("\n✓ All eBay token tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,99 @@
+"""Test coalesced heartbeat flushing in db.py."""
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_heartbeats_coalesce_into_one_rpc():
+    """Test that repeated worker/job heartbeats are written by a single heartbeat_flush RPC."""
+    from src import db
+
+    with patch('src.db._get_pg_pool', return_value=None), \
+         patch('src.db.supabase') as mock_supabase:
+
+        db.update_job_heartbeat('job-1')
+        db.update_job_heartbeat('job-2')
+        db.update_job_heartbeat('job-1')
+        db.upsert_worker_heartbeat('worker-1', {'version': 'old'})
+        db.upsert_worker_heartbeat('worker-1', {'version': 'new'})
+
+        db.flush_heartbeats()
+
+        mock_supabase.rpc.assert_called_once()
+        name, params = mock_supabase.rpc.call_args[0]
+        assert name == 'heartbeat_flush'
+        payload = params['p_payload']
+        assert sorted(payload['job_ids']) == ['job-1', 'job-2']
+        assert payload['worker_id'] == 'worker-1'
+        assert payload['meta'] == {'version': 'new'}
+
+        # Nothing queued: no round-trip at all
+        mock_supabase.rpc.reset_mock()
+        db.flush_heartbeats()
+        mock_supabase.rpc.assert_not_called()
+
+    print("✓ Heartbeats coalesced into a single RPC")
+
+
+def test_failed_flush_requeues_heartbeats():
+    """Test that heartbeats from a failed flush are retried on the next flush."""
+    from src import db
+
+    with patch('src.db._get_pg_pool', return_value=None), \
+         patch('src.db.supabase') as mock_supabase:
+
+        mock_supabase.rpc.return_value.execute.side_effect = Exception("network down")
+        db.update_job_heartbeat('job-3')
+        db.flush_heartbeats()
+
+        mock_supabase.rpc.return_value.execute.side_effect = None
+        mock_supabase.rpc.reset_mock()
+        db.flush_heartbeats()
+
+        payload = mock_supabase.rpc.call_args[0][1]['p_payload']
+        assert payload['job_ids'] == ['job-3']
+
+    print("✓ Failed heartbeat flush was retried")
+
+
+def test_job_heartbeat_throttled_within_min_interval():
+    """Test that a job heartbeat written recently is not re-sent until the min interval passes."""
+    from src import db
+
+    with patch('src.db._get_pg_pool', return_value=None), \
+         patch('src.db.supabase') as mock_supabase, \
+         patch.object(db.settings, 'heartbeat_min_interval_seconds', 60), \
+         patch('src.db.time.monotonic', side_effect=[1000.0, 1010.0, 1070.0]):
+
+        db.update_job_heartbeat('job-4')
+        db.flush_heartbeats()
+        assert mock_supabase.rpc.call_args[0][1]['p_payload']['job_ids'] == ['job-4']
+
+        # 10s later: dropped, so no round-trip at all
+        mock_supabase.rpc.reset_mock()
+        db.update_job_heartbeat('job-4')
+        db.flush_heartbeats()
+        mock_supabase.rpc.assert_not_called()
+
+        # 70s after the first write: sent again
+        db.update_job_heartbeat('job-4')
+        db.flush_heartbeats()
+        assert mock_supabase.rpc.call_args[0][1]['p_payload']['job_ids'] == ['job-4']
+
+    print("✓ Job heartbeat throttled to the min interval")
+
+
+if __name__ == "__main__":
+    try:
+        test_heartbeats_coalesce_into_one_rpc()
+        test_failed_flush_requeues_heartbeats()
+        test_job_heartbeat_throttled_within_min_interval()
+        print("\n✓ All heartbeat flush tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,60 @@
+"""Test per-job memoization of reads in process_job()."""
+import sys
+import os
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_attribution_fetched_once_per_job():
+    """Test that keywords and the valuation share one attribution read per job."""
+    from src.worker import process_job
+    from src.db import _job_scope
+
+    job = {
+        'id': 'test-job-scope',
+        'intake_id': 'test-intake-scope',
+        'source_id': 'test-source-scope',
+        'query_params': {}
+    }
+    attribution = {'intake_id': 'test-intake-scope', 'title': '1921 Morgan Dollar',
+                   'keywords_include': [], 'keywords_exclude': ['replica']}
+    comps = [{'source_id': 'test-source-scope', 'price_cents': 4200, 'price_type': 'sold', 'match_strength': 1.0}]
+
+    with patch('src.db._pg_read', return_value=(True, attribution)) as mock_pg_read, \
+         patch('src.worker.get_source', return_value={'id': 'test-source-scope', 'name': 'Test', 'enabled': True}), \
+         patch('src.worker.get_source_exclude_keywords', return_value=frozenset()), \
+         patch('src.worker.get_collector') as mock_get_collector, \
+         patch('src.worker.get_valuation_inputs', return_value=None), \
+         patch('src.worker.get_sources_bulk', return_value=[]), \
+         patch('src.worker.upsert_valuation', return_value=True) as mock_upsert, \
+         patch('src.worker.log_job_event'), \
+         patch('src.worker.complete_job'), \
+         patch('src.worker.insert_price_points'), \
+         patch('src.worker.get_supabase') as mock_get_supabase:
+
+        mock_get_collector.return_value.collect.return_value = comps
+        mock_get_supabase.return_value.table.return_value.select.return_value.eq.return_value.eq.return_value \
+            .execute.return_value.data = comps
+
+        process_job(job)
+
+        # Reached the valuation, which reads attribution a second time
+        mock_upsert.assert_called_once()
+        assert mock_pg_read.call_count == 1, f"Expected 1 attribution read, got {mock_pg_read.call_count}"
+        assert 'get_attribution' in mock_pg_read.call_args[0][0]
+        assert _job_scope.get() is None, "job scope left set after process_job returned"
+
+    print("✓ Attribution fetched once per job")
+
+
+if __name__ == "__main__":
+    try:
+        test_attribution_fetched_once_per_job()
+        print("\n✓ All job scope tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,76 @@
+"""Test that worker reads use the rebuilt client after reset_supabase()."""
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+class _FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeClient:
+    """Client whose table() reads fail once its HTTP session has been closed."""
+
+    def __init__(self, rows):
+        self.postgrest = MagicMock()
+        self.postgrest.session = _FakeSession()
+        self._rows = rows
+        self.tables_read = []
+
+    def table(self, name):
+        assert not self.postgrest.session.closed, "read through a closed Supabase client"
+        self.tables_read.append(name)
+        query = MagicMock()
+        query.select.return_value.eq.return_value.eq.return_value.execute.return_value.data = self._rows
+        return query
+
+
+def test_fallback_valuation_read_after_reset():
+    """Test that the price point fallback read goes through the client built by reset_supabase()."""
+    from src import db, worker
+
+    comps = [{'source_id': 'test-source-reset', 'price_cents': 4200, 'price_type': 'sold', 'match_strength': 1.0}]
+    clients = [_FakeClient(comps), _FakeClient(comps)]
+    original = db.supabase
+
+    try:
+        with patch('src.db.create_client', side_effect=clients), \
+             patch('src.db._pooled_postgrest_session', side_effect=lambda session: _FakeSession()), \
+             patch('src.worker.get_valuation_inputs', return_value=None), \
+             patch('src.worker.get_sources_bulk', return_value=[]), \
+             patch('src.worker.get_attribution', return_value=None), \
+             patch('src.worker.upsert_valuation', return_value=True):
+
+            db.get_supabase.cache_clear()
+            old_client = db.get_supabase()
+            new_client = db.reset_supabase()
+
+            assert old_client is clients[0] and new_client is clients[1]
+            assert old_client.postgrest.session.closed
+
+            valuation = worker._recompute_valuation('test-intake-reset')
+            assert new_client.tables_read == ['price_points'], "fallback read did not use the rebuilt client"
+            assert valuation['comp_count'] == 1
+    finally:
+        db.get_supabase.cache_clear()
+        db.supabase = original
+
+    print("✓ Fallback valuation read used the rebuilt client")
+
+
+if __name__ == "__main__":
+    try:
+        test_fallback_valuation_read_after_reset()
+        print("\n✓ All Supabase reset tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
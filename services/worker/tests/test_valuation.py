@@ -5,7 +5,7 @@ import os
 # Add parent directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.valuation import ValuationEngine
+from src.valuation import ValuationEngine, Percentiles, valuation_fingerprint
 
 
 def test_valuation_engine_import():
@@ -26,9 +26,65 @@ def test_valuation_engine_basic():
     print("✓ Empty price points handled correctly")
 
 
+def test_valuation_fingerprint_tracks_inputs():
+    """Test that the fingerprint changes exactly when a valuation input changes."""
+    points = [{'source_id': 's1', 'price_cents': 1000, 'price_type': 'sold', 'match_strength': 0.9}]
+    sources = [{'id': 's1', 'reputation_weight': 1.0}]
+    attribution = {'year': 1921, 'cleaned': False}
+    
+    base = valuation_fingerprint(points, sources, attribution)
+    assert base == valuation_fingerprint([dict(points[0])], sources, dict(attribution))
+    # Fields the engine ignores do not matter
+    assert base == valuation_fingerprint(points, sources, {**attribution, 'year': 1922})
+    assert base != valuation_fingerprint(points, sources, {**attribution, 'cleaned': True})
+    assert base != valuation_fingerprint(points, [{'id': 's1', 'reputation_weight': 2.0}], attribution)
+    assert base != valuation_fingerprint([{**points[0], 'price_cents': 1100}], sources, attribution)
+    print("✓ Valuation fingerprint tracks inputs")
+
+
+def test_valuation_from_inputs_matches_price_points():
+    """Test that the compute_valuation_inputs aggregate values the same as the raw comps."""
+    sources = [{'id': 's1', 'reputation_weight': 1.5}, {'id': 's2', 'reputation_weight': 0.5}]
+    points = [
+        {'source_id': 's1' if i % 3 else 's2', 'price_cents': 1000 + 37 * i,
+         'price_type': 'sold' if i % 2 else 'ask', 'match_strength': 0.5 if i % 4 else 1.0}
+        for i in range(25)
+    ] + [{'source_id': 's1', 'price_cents': 99999, 'price_type': 'sold', 'match_strength': 1.0}]
+    
+    # What the RPC returns for these comps
+    inputs = {
+        'comp_count': len(points),
+        'prices': sorted(pp['price_cents'] for pp in points),
+        'sold_count': sum(pp['price_type'] == 'sold' for pp in points),
+        'ask_count': sum(pp['price_type'] == 'ask' for pp in points),
+        'match_strength_sum': sum(pp['match_strength'] for pp in points),
+        'match_strength_count': len(points),
+        'sources': {
+            sid: sum(pp['match_strength'] for pp in points if pp['source_id'] == sid)
+            for sid in ('s1', 's2')
+        },
+    }
+    
+    engine = ValuationEngine(sources=sources)
+    expected = engine.compute_valuation(points)
+    assert engine.compute_valuation_from_inputs(inputs) == expected
+    assert engine.compute_valuation_from_inputs({'comp_count': 0})['comp_count'] == 0
+    
+    # What valuation_percentiles returns: filtered and ranked server-side
+    kept = engine._filter_outliers(inputs['prices'])
+    ranked = {k: v for k, v in zip(Percentiles._fields, engine._compute_percentiles(kept))}
+    fast_inputs = {k: v for k, v in inputs.items() if k != 'prices'}
+    fast_inputs.update(price_count=len(inputs['prices']), filtered_count=len(kept), percentiles=ranked)
+    assert len(kept) < len(points)
+    assert engine.compute_valuation_from_inputs(fast_inputs) == expected
+    print("✓ Aggregated valuation inputs match raw price points")
+
+
 if __name__ == "__main__":
     test_valuation_engine_import()
     test_valuation_engine_basic()
+    test_valuation_fingerprint_tracks_inputs()
+    test_valuation_from_inputs_matches_price_points()
     print("\nAll basic tests passed!")
 
 
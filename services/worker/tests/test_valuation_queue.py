@@ -0,0 +1,67 @@
+"""Test the deferred valuation loop and the shared valuation engines."""
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+# Add parent directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def test_failed_upsert_requeues_intake():
+    """Test that a deferred valuation whose upsert fails is marked dirty again."""
+    from src.worker import _valuation_loop
+
+    comps = [{'source_id': 'test-source-queue', 'price_cents': 4200, 'price_type': 'sold', 'match_strength': 1.0}]
+    stop_event = threading.Event()
+
+    with patch('src.worker.claim_dirty_valuations', return_value=['test-intake-queue']), \
+         patch('src.worker.get_valuation_inputs', return_value=None), \
+         patch('src.worker.get_sources_bulk', return_value=[]), \
+         patch('src.worker.get_attribution', return_value=None), \
+         patch('src.worker.upsert_valuation', return_value=False), \
+         patch('src.worker.mark_valuation_dirty') as mock_mark_dirty, \
+         patch('src.worker.get_supabase') as mock_get_supabase, \
+         patch.object(stop_event, 'wait', side_effect=lambda timeout: stop_event.set()):
+
+        mock_get_supabase.return_value.table.return_value.select.return_value.eq.return_value.eq.return_value \
+            .execute.return_value.data = comps
+
+        _valuation_loop(stop_event)
+
+        mock_mark_dirty.assert_called_once_with('test-intake-queue')
+
+    print("✓ Failed deferred valuation requeued")
+
+
+def test_partial_engine_not_cached():
+    """Test that an engine missing sources (failed bulk read) is rebuilt on the next call."""
+    from src.worker import _engine_for, _engine_cache
+
+    source_ids = frozenset(['test-source-a', 'test-source-b'])
+    _engine_cache.clear()
+
+    with patch('src.worker.get_sources_bulk', return_value=[{'id': 'test-source-a'}]) as mock_bulk:
+        _engine_for(source_ids)
+        _engine_for(source_ids)
+        assert mock_bulk.call_count == 2, "partial engine was cached"
+
+    with patch('src.worker.get_sources_bulk', return_value=[{'id': 'test-source-a'}, {'id': 'test-source-b'}]) as mock_bulk:
+        engine = _engine_for(source_ids)
+        assert _engine_for(source_ids) is engine
+        assert mock_bulk.call_count == 1
+
+    _engine_cache.clear()
+    print("✓ Partial valuation engine not cached")
+
+
+if __name__ == "__main__":
+    try:
+        test_failed_upsert_requeues_intake()
+        test_partial_engine_not_cached()
+        print("\n✓ All valuation queue tests passed!")
+    except Exception as e:
+        print(f"\n✗ Test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,77 @@
+-- ============================================================================
+-- BULK UPSERT FOR PRICE POINTS
+-- ============================================================================
+-- Set-based variant of upsert_price_point: takes a JSONB array of price point
+-- objects and upserts them in a single statement, so a job's price points cost
+-- one PostgREST round-trip instead of one per row.
+
+CREATE OR REPLACE FUNCTION upsert_price_points_bulk(p_rows JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  affected_count INTEGER;
+BEGIN
+  WITH incoming AS (
+    SELECT *
+    FROM jsonb_to_recordset(p_rows) AS r(
+      intake_id UUID,
+      source_id UUID,
+      dedupe_key TEXT,
+      job_id UUID,
+      price_cents INTEGER,
+      price_type TEXT,
+      raw_payload JSONB,
+      listing_url TEXT,
+      listing_title TEXT,
+      listing_date TIMESTAMPTZ,
+      observed_at TIMESTAMPTZ,
+      match_strength DECIMAL(3,2),
+      external_id TEXT,
+      filtered_out BOOLEAN
+    )
+  ),
+  -- ON CONFLICT cannot touch the same row twice in one statement, so keep the
+  -- strongest match per dedupe key (NULL keys never conflict and pass through)
+  deduped AS (
+    (
+      SELECT DISTINCT ON (intake_id, source_id, dedupe_key) *
+      FROM incoming
+      WHERE dedupe_key IS NOT NULL
+      ORDER BY intake_id, source_id, dedupe_key, match_strength DESC NULLS LAST
+    )
+    UNION ALL
+    SELECT * FROM incoming WHERE dedupe_key IS NULL
+  )
+  INSERT INTO price_points (
+    intake_id, source_id, dedupe_key, job_id, price_cents, price_type,
+    raw_payload, listing_url, listing_title, listing_date, observed_at,
+    match_strength, external_id, filtered_out
+  )
+  SELECT
+    intake_id, source_id, dedupe_key, job_id, price_cents, price_type,
+    raw_payload, listing_url, listing_title, listing_date, observed_at,
+    COALESCE(match_strength, 1.0), external_id, COALESCE(filtered_out, false)
+  FROM deduped
+  ON CONFLICT (intake_id, source_id, dedupe_key)
+  DO UPDATE SET
+    job_id = EXCLUDED.job_id,
+    price_cents = EXCLUDED.price_cents,
+    price_type = EXCLUDED.price_type,
+    raw_payload = COALESCE(EXCLUDED.raw_payload, price_points.raw_payload),
+    listing_url = EXCLUDED.listing_url,
+    listing_title = EXCLUDED.listing_title,
+    listing_date = EXCLUDED.listing_date,
+    observed_at = EXCLUDED.observed_at,
+    match_strength = CASE
+      WHEN EXCLUDED.match_strength > price_points.match_strength THEN EXCLUDED.match_strength
+      ELSE price_points.match_strength
+    END,
+    external_id = COALESCE(EXCLUDED.external_id, price_points.external_id),
+    filtered_out = EXCLUDED.filtered_out
+  WHERE EXCLUDED.match_strength > price_points.match_strength
+     OR (EXCLUDED.external_id IS NOT NULL AND price_points.external_id IS NULL)
+     OR (EXCLUDED.raw_payload IS NOT NULL AND price_points.raw_payload IS NULL);
+
+  GET DIAGNOSTICS affected_count = ROW_COUNT;
+  RETURN affected_count;
+END;
+$$ LANGUAGE plpgsql;
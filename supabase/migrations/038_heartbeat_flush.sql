@@ -0,0 +1,34 @@
+-- ============================================================================
+-- COALESCED HEARTBEAT FLUSH
+-- ============================================================================
+-- Workers buffer their own heartbeat and the heartbeats of the jobs they are
+-- running, then flush them together on a timer. One call refreshes every
+-- listed running job and upserts the worker row in a single transaction.
+--
+-- p_payload shape:
+--   { "worker_id": "worker-1", "meta": {...}, "job_ids": ["<uuid>", ...] }
+-- Both parts are optional; an absent worker_id skips the worker upsert.
+
+CREATE OR REPLACE FUNCTION heartbeat_flush(p_payload JSONB)
+RETURNS VOID AS $$
+BEGIN
+  IF jsonb_typeof(p_payload->'job_ids') = 'array' THEN
+    UPDATE scrape_jobs
+    SET
+      heartbeat_at = NOW(),
+      updated_at = NOW()
+    WHERE id IN (
+      SELECT jsonb_array_elements_text(p_payload->'job_ids')::UUID
+    )
+    AND status = 'running';
+  END IF;
+
+  IF p_payload->>'worker_id' IS NOT NULL THEN
+    INSERT INTO worker_heartbeats (worker_id, last_seen_at, meta)
+    VALUES (p_payload->>'worker_id', NOW(), COALESCE(p_payload->'meta', '{}'::jsonb))
+    ON CONFLICT (worker_id) DO UPDATE SET
+      last_seen_at = NOW(),
+      meta = EXCLUDED.meta;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,18 @@
+-- ============================================================================
+-- ATOMIC SOURCE FAILURE COUNTER
+-- ============================================================================
+-- Increments failure_streak in a single UPDATE so concurrent workers failing
+-- against the same source cannot lose increments (replaces the client-side
+-- read-modify-write in update_source_stats).
+
+CREATE OR REPLACE FUNCTION increment_source_failure(p_source_id UUID)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE sources
+  SET
+    failure_streak = COALESCE(failure_streak, 0) + 1,
+    last_failure_at = NOW(),
+    updated_at = NOW()
+  WHERE id = p_source_id;
+END;
+$$ LANGUAGE plpgsql;
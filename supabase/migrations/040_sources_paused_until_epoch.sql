@@ -0,0 +1,17 @@
+-- ============================================================================
+-- NUMERIC PAUSE EXPIRY FOR SOURCES
+-- ============================================================================
+-- Exposes paused_until as integer Unix seconds so workers can gate on
+-- `paused_until_epoch > now` without parsing ISO timestamps on every check.
+
+-- EXTRACT(EPOCH FROM timestamptz) is only marked STABLE, which generated
+-- columns reject; the epoch of a timestamptz does not depend on the session
+-- time zone, so this wrapper is safe to declare IMMUTABLE.
+CREATE OR REPLACE FUNCTION timestamptz_to_epoch(p_ts TIMESTAMPTZ)
+RETURNS BIGINT AS $$
+  SELECT EXTRACT(EPOCH FROM p_ts)::BIGINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE sources
+  ADD COLUMN IF NOT EXISTS paused_until_epoch BIGINT
+    GENERATED ALWAYS AS (timestamptz_to_epoch(paused_until)) STORED;
@@ -0,0 +1,22 @@
+-- ============================================================================
+-- NOTIFY WORKERS OF NEW SCRAPE JOBS
+-- ============================================================================
+-- Workers LISTEN on 'scrape_jobs_new' and sleep until a job arrives instead of
+-- polling claim_next_pending_job. The payload is the job_type so workers can
+-- ignore queues they do not serve. Polling remains as a timeout fallback
+-- (e.g. for retryable jobs whose next_retry_at has just passed).
+
+CREATE OR REPLACE FUNCTION notify_scrape_job_new()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM pg_notify('scrape_jobs_new', COALESCE(NEW.job_type, ''));
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_scrape_jobs_notify_new ON scrape_jobs;
+CREATE TRIGGER trg_scrape_jobs_notify_new
+  AFTER INSERT ON scrape_jobs
+  FOR EACH ROW
+  WHEN (NEW.status = 'pending')
+  EXECUTE FUNCTION notify_scrape_job_new();
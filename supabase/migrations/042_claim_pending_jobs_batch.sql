@@ -0,0 +1,74 @@
+-- ============================================================================
+-- BATCH JOB CLAIMING
+-- ============================================================================
+-- Multi-row variant of claim_next_pending_job: claims up to p_limit pending
+-- jobs in one statement so a worker can prefetch work and amortize the
+-- round-trip. FOR UPDATE SKIP LOCKED keeps concurrent workers from queueing
+-- behind the same head-of-queue rows.
+
+create or replace function public.claim_pending_jobs(
+  p_worker_id text,
+  p_lock_timeout_seconds integer default 300,
+  p_job_type text default null,
+  p_limit integer default 4
+)
+returns setof public.scrape_jobs
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  v_now timestamptz := now();
+begin
+  return query
+  update public.scrape_jobs sj
+  set
+    status       = 'running',
+    locked_by    = p_worker_id,
+    locked_at    = v_now,
+    heartbeat_at = v_now,
+    started_at   = coalesce(sj.started_at, v_now),
+    updated_at   = v_now
+  where sj.id in (
+    select c.id
+    from public.scrape_jobs c
+    where c.status = 'pending'
+      and (c.next_retry_at is null or c.next_retry_at <= v_now)
+      and (p_job_type is null or c.job_type = p_job_type)
+    order by c.created_at asc
+    limit greatest(p_limit, 1)
+    for update skip locked
+  )
+    and sj.status = 'pending'
+  returning sj.*;
+end;
+$$;
+
+-- Hand prefetched-but-unstarted jobs back to the queue (e.g. on worker shutdown)
+create or replace function public.release_claimed_jobs(
+  p_worker_id text,
+  p_job_ids uuid[]
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+  released_count integer;
+begin
+  update public.scrape_jobs
+  set
+    status = 'pending',
+    locked_by = null,
+    locked_at = null,
+    heartbeat_at = null,
+    updated_at = now()
+  where id = any(p_job_ids)
+    and status = 'running'
+    and locked_by = p_worker_id;
+
+  get diagnostics released_count = row_count;
+  return released_count;
+end;
+$$;
@@ -0,0 +1,59 @@
+-- ============================================================================
+-- MERGE PRICE POINTS FROM A COPY STAGING TABLE
+-- ============================================================================
+-- For large batches the worker streams price points with COPY into a
+-- per-transaction temp table (tmp_price_points, ON COMMIT DROP) and then
+-- calls this function, which applies the same dedupe and ON CONFLICT rules as
+-- upsert_price_points_bulk without the JSON encode/decode round-trip.
+
+CREATE OR REPLACE FUNCTION merge_staged_price_points()
+RETURNS INTEGER AS $$
+DECLARE
+  affected_count INTEGER;
+BEGIN
+  -- ON CONFLICT cannot touch the same row twice in one statement, so keep the
+  -- strongest match per dedupe key (NULL keys never conflict and pass through)
+  WITH deduped AS (
+    (
+      SELECT DISTINCT ON (intake_id, source_id, dedupe_key) *
+      FROM tmp_price_points
+      WHERE dedupe_key IS NOT NULL
+      ORDER BY intake_id, source_id, dedupe_key, match_strength DESC NULLS LAST
+    )
+    UNION ALL
+    SELECT * FROM tmp_price_points WHERE dedupe_key IS NULL
+  )
+  INSERT INTO price_points (
+    intake_id, source_id, dedupe_key, job_id, price_cents, price_type,
+    raw_payload, listing_url, listing_title, listing_date, observed_at,
+    match_strength, external_id, filtered_out
+  )
+  SELECT
+    intake_id, source_id, dedupe_key, job_id, price_cents, price_type,
+    raw_payload, listing_url, listing_title, listing_date, observed_at,
+    COALESCE(match_strength, 1.0), external_id, COALESCE(filtered_out, false)
+  FROM deduped
+  ON CONFLICT (intake_id, source_id, dedupe_key)
+  DO UPDATE SET
+    job_id = EXCLUDED.job_id,
+    price_cents = EXCLUDED.price_cents,
+    price_type = EXCLUDED.price_type,
+    raw_payload = COALESCE(EXCLUDED.raw_payload, price_points.raw_payload),
+    listing_url = EXCLUDED.listing_url,
+    listing_title = EXCLUDED.listing_title,
+    listing_date = EXCLUDED.listing_date,
+    observed_at = EXCLUDED.observed_at,
+    match_strength = CASE
+      WHEN EXCLUDED.match_strength > price_points.match_strength THEN EXCLUDED.match_strength
+      ELSE price_points.match_strength
+    END,
+    external_id = COALESCE(EXCLUDED.external_id, price_points.external_id),
+    filtered_out = EXCLUDED.filtered_out
+  WHERE EXCLUDED.match_strength > price_points.match_strength
+     OR (EXCLUDED.external_id IS NOT NULL AND price_points.external_id IS NULL)
+     OR (EXCLUDED.raw_payload IS NOT NULL AND price_points.raw_payload IS NULL);
+
+  GET DIAGNOSTICS affected_count = ROW_COUNT;
+  RETURN affected_count;
+END;
+$$ LANGUAGE plpgsql;
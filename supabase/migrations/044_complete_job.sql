@@ -0,0 +1,53 @@
+-- ============================================================================
+-- ATOMIC JOB COMPLETION
+-- ============================================================================
+-- Finishes a job in one transaction: sets the final status, optionally records
+-- source success/failure, and writes the closing job log line. Replaces the
+-- separate status update + log insert (+ source stats) round-trips at job end.
+--
+-- completed_at is only set for terminal states ('succeeded', 'failed'), the
+-- same rule update_job_status applies client-side. p_source_id NULL skips the
+-- source stats update; p_log NULL skips the log insert.
+-- p_log shape: { "level": "info", "message": "...", "metadata": {...} }
+
+CREATE OR REPLACE FUNCTION complete_job(
+  p_job_id UUID,
+  p_status TEXT,
+  p_error TEXT DEFAULT NULL,
+  p_source_id UUID DEFAULT NULL,
+  p_success BOOLEAN DEFAULT NULL,
+  p_log JSONB DEFAULT NULL
+)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE scrape_jobs
+  SET
+    status = p_status,
+    error_message = COALESCE(p_error, error_message),
+    completed_at = CASE
+      WHEN p_status IN ('succeeded', 'failed') THEN NOW()
+      ELSE completed_at
+    END
+  WHERE id = p_job_id;
+
+  IF p_source_id IS NOT NULL AND p_success IS NOT NULL THEN
+    IF p_success THEN
+      UPDATE sources
+      SET last_success_at = NOW(), failure_streak = 0
+      WHERE id = p_source_id;
+    ELSE
+      PERFORM increment_source_failure(p_source_id);
+    END IF;
+  END IF;
+
+  IF p_log IS NOT NULL THEN
+    INSERT INTO scrape_job_logs (job_id, log_level, message, metadata)
+    VALUES (
+      p_job_id,
+      p_log->>'level',
+      p_log->>'message',
+      COALESCE(p_log->'metadata', '{}'::jsonb)
+    );
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
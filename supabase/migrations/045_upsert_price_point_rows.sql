@@ -0,0 +1,38 @@
+-- ============================================================================
+-- POSITIONAL BULK UPSERT FOR PRICE POINTS
+-- ============================================================================
+-- Same as upsert_price_points_bulk, but each row is a JSON array in a fixed
+-- column order instead of an object, so the worker does not repeat all 14
+-- key names per row in the request body. Rows are re-keyed server-side and
+-- handed to upsert_price_points_bulk, which keeps the dedupe/conflict rules
+-- in one place.
+--
+-- Column order (must match _PRICE_POINT_COLUMNS in services/worker/src/db.py):
+--   intake_id, source_id, dedupe_key, job_id, price_cents, price_type,
+--   raw_payload, listing_url, listing_title, listing_date, observed_at,
+--   match_strength, external_id, filtered_out
+
+CREATE OR REPLACE FUNCTION upsert_price_point_rows(p_rows JSONB)
+RETURNS INTEGER AS $$
+BEGIN
+  RETURN upsert_price_points_bulk((
+    SELECT COALESCE(jsonb_agg(jsonb_build_object(
+      'intake_id', r->0,
+      'source_id', r->1,
+      'dedupe_key', r->2,
+      'job_id', r->3,
+      'price_cents', r->4,
+      'price_type', r->5,
+      'raw_payload', r->6,
+      'listing_url', r->7,
+      'listing_title', r->8,
+      'listing_date', r->9,
+      'observed_at', r->10,
+      'match_strength', r->11,
+      'external_id', r->12,
+      'filtered_out', r->13
+    )), '[]'::jsonb)
+    FROM jsonb_array_elements(p_rows) AS r
+  ));
+END;
+$$ LANGUAGE plpgsql;
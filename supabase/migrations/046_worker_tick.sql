@@ -0,0 +1,23 @@
+-- ============================================================================
+-- WORKER TICK (HEARTBEAT FLUSH + STUCK JOB RECLAIM)
+-- ============================================================================
+-- One periodic admin call per worker: flushes buffered worker/job heartbeats
+-- (same payload as heartbeat_flush) and, when p_reclaim is true, reclaims
+-- jobs whose heartbeat has gone stale, in a single transaction.
+
+CREATE OR REPLACE FUNCTION worker_tick(
+  p_payload JSONB,
+  p_lock_timeout_seconds INTEGER DEFAULT 300,
+  p_reclaim BOOLEAN DEFAULT false
+)
+RETURNS TABLE (reclaimed INTEGER) AS $$
+BEGIN
+  PERFORM heartbeat_flush(COALESCE(p_payload, '{}'::jsonb));
+
+  IF p_reclaim THEN
+    RETURN QUERY SELECT reclaim_stuck_jobs(p_lock_timeout_seconds);
+  ELSE
+    RETURN QUERY SELECT 0;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
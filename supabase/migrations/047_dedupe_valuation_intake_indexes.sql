@@ -0,0 +1,21 @@
+-- ============================================================================
+-- DEDUPE VALUATIONS.INTAKE_ID INDEXES
+-- ============================================================================
+-- valuations.intake_id ended up with three indexes: the column-level UNIQUE
+-- from 001 (valuations_intake_id_key), the named valuations_intake_id_unique
+-- constraint from 012, and the plain idx_valuations_intake_id from 001. Every
+-- upsert_valuation call maintains all three. Keep only the named constraint,
+-- which upsert_valuation's ON CONFLICT (intake_id) relies on.
+
+DROP INDEX IF EXISTS idx_valuations_intake_id;
+
+DO $$
+BEGIN
+  IF EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conname = 'valuations_intake_id_unique'
+      AND conrelid = 'public.valuations'::regclass
+  ) THEN
+    ALTER TABLE valuations DROP CONSTRAINT IF EXISTS valuations_intake_id_key;
+  END IF;
+END $$;
@@ -0,0 +1,33 @@
+-- ============================================================================
+-- RECORD SOURCE OUTCOME
+-- ============================================================================
+-- Single entry point for source success/failure tracking. Success resets the
+-- failure streak; failure increments it atomically. Returns the resulting
+-- failure_streak so the caller's circuit breaker does not have to re-read the
+-- source row (NULL if the source does not exist).
+
+CREATE OR REPLACE FUNCTION record_source_outcome(p_source_id UUID, p_success BOOLEAN)
+RETURNS INTEGER AS $$
+DECLARE
+  v_streak INTEGER;
+BEGIN
+  IF p_success THEN
+    UPDATE sources
+    SET
+      last_success_at = NOW(),
+      failure_streak = 0
+    WHERE id = p_source_id
+    RETURNING failure_streak INTO v_streak;
+  ELSE
+    UPDATE sources
+    SET
+      failure_streak = COALESCE(failure_streak, 0) + 1,
+      last_failure_at = NOW(),
+      updated_at = NOW()
+    WHERE id = p_source_id
+    RETURNING failure_streak INTO v_streak;
+  END IF;
+
+  RETURN v_streak;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,14 @@
+-- ============================================================================
+-- NOTIFY WORKERS OF REQUEUED SCRAPE JOBS
+-- ============================================================================
+-- Migration 041 only announced freshly inserted jobs. Jobs that go back to
+-- 'pending' (stuck-job reclaim, release_claimed_jobs at worker shutdown,
+-- manual requeues) were only picked up on the next poll timeout. Announce
+-- those status transitions on the same channel and payload.
+
+DROP TRIGGER IF EXISTS trg_scrape_jobs_notify_requeued ON scrape_jobs;
+CREATE TRIGGER trg_scrape_jobs_notify_requeued
+  AFTER UPDATE OF status ON scrape_jobs
+  FOR EACH ROW
+  WHEN (NEW.status = 'pending' AND OLD.status IS DISTINCT FROM 'pending')
+  EXECUTE FUNCTION notify_scrape_job_new();
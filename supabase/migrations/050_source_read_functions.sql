@@ -0,0 +1,32 @@
+-- ============================================================================
+-- PLAN-CACHED READ FUNCTIONS FOR THE WORKER
+-- ============================================================================
+-- The worker reads a source, its active rules and an intake's attribution at
+-- the start of every job. Over a direct connection it calls these instead of
+-- ad-hoc SELECTs: PL/pgSQL keeps each statement's plan for the life of the
+-- session, so repeated calls skip parsing and planning.
+-- Callers pick the columns they need (SELECT <cols> FROM get_source(...)).
+
+CREATE OR REPLACE FUNCTION get_source(p_id UUID)
+RETURNS SETOF sources AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM sources WHERE id = p_id LIMIT 1;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION get_source_rules(p_source_id UUID)
+RETURNS SETOF source_rules AS $$
+BEGIN
+  RETURN QUERY
+    SELECT * FROM source_rules
+    WHERE source_id = p_source_id AND active = TRUE
+    ORDER BY priority ASC;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION get_attribution(p_intake_id UUID)
+RETURNS SETOF attributions AS $$
+BEGIN
+  RETURN QUERY SELECT * FROM attributions WHERE intake_id = p_intake_id LIMIT 1;
+END;
+$$ LANGUAGE plpgsql STABLE;
@@ -0,0 +1,50 @@
+-- ============================================================================
+-- DEFERRED, COALESCED VALUATION RECOMPUTE
+-- ============================================================================
+-- When several source jobs for one intake finish back to back, each used to
+-- recompute the intake's valuation. With VALUATION_DEBOUNCE_SECONDS set,
+-- workers only mark the intake dirty here; a worker loop later claims intakes
+-- that have been dirty for at least the debounce window and recomputes each
+-- once.
+--
+-- dirty_at is the FIRST completion since the last recompute (later marks do
+-- not push it back), so a steady stream of jobs cannot starve an intake.
+
+CREATE TABLE IF NOT EXISTS needs_valuation (
+  intake_id UUID PRIMARY KEY REFERENCES coin_intakes(id) ON DELETE CASCADE,
+  dirty_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_needs_valuation_dirty_at
+  ON needs_valuation(dirty_at);
+
+CREATE OR REPLACE FUNCTION mark_valuation_dirty(p_intake_id UUID)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO needs_valuation (intake_id)
+  VALUES (p_intake_id)
+  ON CONFLICT (intake_id) DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Removes and returns up to p_limit intakes dirty for at least
+-- p_debounce_seconds. SKIP LOCKED lets several workers drain the queue.
+CREATE OR REPLACE FUNCTION claim_dirty_valuations(
+  p_debounce_seconds DOUBLE PRECISION DEFAULT 10,
+  p_limit INTEGER DEFAULT 20
+)
+RETURNS TABLE(intake_id UUID) AS $$
+BEGIN
+  RETURN QUERY
+  DELETE FROM needs_valuation nv
+  WHERE nv.intake_id IN (
+    SELECT c.intake_id
+    FROM needs_valuation c
+    WHERE c.dirty_at <= NOW() - make_interval(secs => p_debounce_seconds)
+    ORDER BY c.dirty_at ASC
+    LIMIT GREATEST(p_limit, 1)
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING nv.intake_id;
+END;
+$$ LANGUAGE plpgsql;
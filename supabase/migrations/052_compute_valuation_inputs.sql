@@ -0,0 +1,41 @@
+-- ============================================================================
+-- SERVER-SIDE VALUATION INPUTS
+-- ============================================================================
+-- A valuation recompute used to download every unfiltered price point row
+-- for the intake. This aggregates them into the one row ValuationEngine
+-- needs: the non-zero prices (sorted), type counts, match strength totals and
+-- the match strength sum per source (for reputation weighting).
+--
+-- Result shape:
+--   { "comp_count": 42, "prices": [1200, ...], "sold_count": 30,
+--     "ask_count": 12, "match_strength_sum": 38.5,
+--     "match_strength_count": 42, "sources": { "<uuid>": 20.0, ... } }
+
+CREATE OR REPLACE FUNCTION compute_valuation_inputs(p_intake_id UUID)
+RETURNS JSONB AS $$
+  SELECT jsonb_build_object(
+    'comp_count', COUNT(*),
+    'prices', COALESCE(
+      jsonb_agg(pp.price_cents ORDER BY pp.price_cents) FILTER (WHERE pp.price_cents <> 0),
+      '[]'::jsonb
+    ),
+    'sold_count', COUNT(*) FILTER (WHERE pp.price_type = 'sold'),
+    'ask_count', COUNT(*) FILTER (WHERE pp.price_type = 'ask'),
+    'match_strength_sum', COALESCE(SUM(pp.match_strength), 0),
+    'match_strength_count', COUNT(pp.match_strength),
+    'sources', COALESCE((
+      SELECT jsonb_object_agg(s.source_id, s.match_strength_sum)
+      FROM (
+        SELECT source_id, SUM(COALESCE(match_strength, 1.0)) AS match_strength_sum
+        FROM price_points
+        WHERE intake_id = p_intake_id
+          AND filtered_out = false
+          AND source_id IS NOT NULL
+        GROUP BY source_id
+      ) s
+    ), '{}'::jsonb)
+  )
+  FROM price_points pp
+  WHERE pp.intake_id = p_intake_id
+    AND pp.filtered_out = false;
+$$ LANGUAGE sql STABLE;
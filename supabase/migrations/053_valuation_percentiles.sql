@@ -0,0 +1,65 @@
+-- ============================================================================
+-- SQL PERCENTILE FAST PATH
+-- ============================================================================
+-- With SQL_PERCENTILE_FAST_PATH=true the worker calls this instead of
+-- compute_valuation_inputs: the IQR outlier filter and percentile ranks run
+-- here and no prices are returned, only counts and the seven ranks.
+--
+-- Results match ValuationEngine exactly: same integer IQR bounds
+-- (q1/q3 at n/4 and 3n/4, margin floor(3 * iqr / 2), no filter under 4
+-- prices), nearest-rank percentiles at floor(p * (n - 1)) computed in float8
+-- like Python, and a floored integer mean. percentile_cont would interpolate
+-- and change stored valuations.
+--
+-- Result: compute_valuation_inputs without "prices", plus
+--   "price_count": prices before the outlier filter,
+--   "filtered_count": prices after it,
+--   "percentiles": { "p10", "p20", "p40", "median", "p60", "p80", "p90",
+--                    "mean" } or null when no prices remain
+
+CREATE OR REPLACE FUNCTION valuation_percentiles(p_intake_id UUID)
+RETURNS JSONB AS $$
+DECLARE
+  v_inputs JSONB;
+  v_prices BIGINT[];
+  v_n INTEGER;
+  v_k INTEGER;
+  v_q1 BIGINT;
+  v_q3 BIGINT;
+  v_margin BIGINT;
+BEGIN
+  v_inputs := compute_valuation_inputs(p_intake_id);
+
+  SELECT COALESCE(array_agg(e.price::BIGINT ORDER BY e.ord), '{}')
+  INTO v_prices
+  FROM jsonb_array_elements_text(v_inputs->'prices') WITH ORDINALITY AS e(price, ord);
+  v_n := cardinality(v_prices);
+
+  -- Prices are sorted, so the survivors stay sorted
+  IF v_n >= 4 THEN
+    v_q1 := v_prices[v_n / 4 + 1];
+    v_q3 := v_prices[(3 * v_n) / 4 + 1];
+    v_margin := (3 * (v_q3 - v_q1)) / 2;
+    SELECT COALESCE(array_agg(p ORDER BY p), '{}')
+    INTO v_prices
+    FROM unnest(v_prices) AS p
+    WHERE p BETWEEN v_q1 - v_margin AND v_q3 + v_margin;
+  END IF;
+  v_k := cardinality(v_prices);
+
+  RETURN (v_inputs - 'prices') || jsonb_build_object(
+    'price_count', v_n,
+    'filtered_count', v_k,
+    'percentiles', CASE WHEN v_k = 0 THEN NULL ELSE jsonb_build_object(
+      'p10', v_prices[floor(0.10::float8 * (v_k - 1))::INTEGER + 1],
+      'p20', v_prices[floor(0.20::float8 * (v_k - 1))::INTEGER + 1],
+      'p40', v_prices[floor(0.40::float8 * (v_k - 1))::INTEGER + 1],
+      'median', v_prices[floor(0.50::float8 * (v_k - 1))::INTEGER + 1],
+      'p60', v_prices[floor(0.60::float8 * (v_k - 1))::INTEGER + 1],
+      'p80', v_prices[floor(0.80::float8 * (v_k - 1))::INTEGER + 1],
+      'p90', v_prices[floor(0.90::float8 * (v_k - 1))::INTEGER + 1],
+      'mean', (SELECT div(SUM(p), v_k) FROM unnest(v_prices) AS p)
+    ) END
+  );
+END;
+$$ LANGUAGE plpgsql STABLE;
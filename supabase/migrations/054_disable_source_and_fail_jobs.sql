@@ -0,0 +1,40 @@
+-- ============================================================================
+-- DISABLE SOURCE AND FAIL ITS QUEUED JOBS
+-- ============================================================================
+-- When a source's credentials are rejected (e.g. eBay authentication
+-- failure) every queued job for it would fail the same way. This disables
+-- the source and fails its pending and retryable jobs in one transaction, so
+-- other workers stop claiming them immediately instead of each hitting the
+-- same authentication error.
+--
+-- Returns the number of jobs failed (NULL if the source does not exist).
+
+CREATE OR REPLACE FUNCTION disable_source_and_fail_jobs(p_source_id UUID, p_reason TEXT)
+RETURNS INTEGER AS $$
+DECLARE
+  v_failed INTEGER;
+BEGIN
+  UPDATE sources
+  SET
+    enabled = false,
+    last_failure_at = NOW(),
+    updated_at = NOW()
+  WHERE id = p_source_id;
+
+  IF NOT FOUND THEN
+    RETURN NULL;
+  END IF;
+
+  UPDATE scrape_jobs
+  SET
+    status = 'failed',
+    error_message = p_reason,
+    completed_at = NOW(),
+    updated_at = NOW()
+  WHERE source_id = p_source_id
+    AND status IN ('pending', 'retryable');
+
+  GET DIAGNOSTICS v_failed = ROW_COUNT;
+  RETURN v_failed;
+END;
+$$ LANGUAGE plpgsql;